@@ -0,0 +1,608 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite of dav_utils hot paths.
+
+run examples:
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --filter descriptors --compare results.json --threshold 1.2
+"""
+import argparse
+import contextlib
+import csv
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from dav_utils import descriptors
+from dav_utils.config import Config
+from dav_utils.descriptors import argument_type_checker
+from dav_utils.logger import Logging
+from dav_utils.utils import Util
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# name -> function(work_dir) that returns a callable to measure
+CASES = dict()
+# name -> function(work_dir) that returns a callable which result allocated memory is measured
+MEMORY_CASES = dict()
+UUID_VALUE = 'ac158335-a0e2-4e59-b722-08328b2985d4'
+DESCRIPTOR_VALUES = {
+    'StringType': 'value',
+    'IntType': 1,
+    'ListType': [1],
+    'DictType': {'k': 'v'},
+    'BoolType': True,
+    'NullableDictType': None,
+    'NullableStringType': None,
+    'NullableIntType': None,
+    'UuidStringType': UUID_VALUE,
+    'WritableFile': 'benchmark.txt',
+    'HttpMethod': 'GET',
+}
+
+
+def parse_args():
+    """Incoming script arguments parser."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--filter', default='', type=str, help='Run cases which names contain the substring')
+    parser.add_argument('--repeat', default=5, type=int, help='Number of measurements of each case')
+    parser.add_argument('--output', default=None, type=str, help='Save JSON results to the file')
+    parser.add_argument('--compare', default=None, type=str, help='JSON results of a baseline run')
+    parser.add_argument('--threshold', default=1.1, type=float,
+                        help='Slowdown ratio (current / baseline) reported as a regression')
+    return parser.parse_args()
+
+
+def case(name: str):
+    """Register benchmark case."""
+    def decorator(func):
+        CASES[name] = func
+        return func
+    return decorator
+
+
+def memory_case(name: str):
+    """Register memory benchmark case."""
+    def decorator(func):
+        MEMORY_CASES[name] = func
+        return func
+    return decorator
+
+
+def descriptor_holder(descriptor_class, work_dir: str):
+    """Return (instance of a class with descriptor_class attribute, valid attribute value)."""
+    holder = type('Holder', (), {'attr': descriptor_class('attr')})()
+    value = DESCRIPTOR_VALUES[descriptor_class.__name__]
+    if descriptor_class is descriptors.WritableFile:
+        value = os.path.join(work_dir, value)
+    holder.attr = value
+    return holder, value
+
+
+def descriptor_cases():
+    """Register set/get cases for each TypeChecker subclass."""
+    for class_name in DESCRIPTOR_VALUES:
+        descriptor_class = getattr(descriptors, class_name)
+
+        def set_case(work_dir, descriptor_class=descriptor_class):
+            holder, value = descriptor_holder(descriptor_class, work_dir)
+
+            def run():
+                holder.attr = value
+            return run
+
+        def get_case(work_dir, descriptor_class=descriptor_class):
+            holder, __ = descriptor_holder(descriptor_class, work_dir)
+            return lambda: holder.attr
+
+        case('descriptors.{}.set'.format(class_name))(set_case)
+        case('descriptors.{}.get'.format(class_name))(get_case)
+
+
+descriptor_cases()
+
+
+@case('descriptors.argument_type_checker')
+def argument_type_checker_case(work_dir):
+    """Call a decorated function."""
+    @argument_type_checker
+    def annotated(value: str, count: int = 1):
+        return value
+
+    return lambda: annotated('value', count=2)
+
+
+@case('descriptors.plain_call')
+def plain_call_case(work_dir):
+    """Not decorated function call (argument_type_checker baseline)."""
+    def annotated(value: str, count: int = 1):
+        return value
+
+    return lambda: annotated('value', count=2)
+
+
+class NullStream:
+    """Text stream that discards written text (stdout of the benchmarked loggers)."""
+
+    def write(self, text: str) -> int:
+        """Discard text."""
+        return len(text)
+
+    def flush(self):
+        """Nothing to flush."""
+
+
+NULL_STREAM = NullStream()
+
+
+def quiet_config(*args, **kwargs) -> Config:
+    """Create Config which logger writes to NULL_STREAM."""
+    with contextlib.redirect_stdout(NULL_STREAM):
+        return Config(*args, **kwargs)
+
+
+def devnull_logging(log_lvl: str) -> Logging:
+    """Create Logging with exactly one handler that writes to NULL_STREAM.
+
+    All Logging instances share one logger, so unreachable instances are collected first
+    (their __del__ removes the logger handlers) and handlers of live instances are replaced.
+    """
+    gc.collect()
+    with contextlib.redirect_stdout(NULL_STREAM):
+        logger = Logging('%H:%M:%S', '%(asctime)s.%(msecs)d|%(levelname).1s|%(message)s', log_lvl)
+    for handler in logger.root_logger.handlers.copy():
+        logger.root_logger.removeHandler(handler)
+    logger.handler = logging.StreamHandler(NULL_STREAM)
+    logger.handler.setFormatter(logger.formatter)
+    logger.root_logger.addHandler(logger.handler)
+    return logger
+
+
+@case('logger.Logging.enabled')
+def logging_enabled_case(work_dir):
+    """Message that is written."""
+    logger = devnull_logging('DEBUG')
+    return lambda: logger.debug('message')
+
+
+@case('logger.Logging.suppressed')
+def logging_suppressed_case(work_dir):
+    """Message below log level."""
+    logger = devnull_logging('ERROR')
+    return lambda: logger.debug('message')
+
+
+@case('utils.Util.read_file_gen.10k_lines')
+def read_file_gen_case(work_dir):
+    """Read 10k lines file."""
+    file_path = os.path.join(work_dir, 'read.txt')
+    Util.save_text_file(file_path, ['line {}\n'.format(i) for i in range(10000)])
+    return lambda: sum(1 for __ in Util.read_file_gen(file_path))
+
+
+@case('utils.Util.save_text_file.10k_lines')
+def save_text_file_case(work_dir):
+    """Save 10k lines file."""
+    file_path = os.path.join(work_dir, 'save.txt')
+    lines = ['line {}\n'.format(i) for i in range(10000)]
+    return lambda: Util.save_text_file(file_path, lines)
+
+
+@case('utils.Util.save_json_file.1k_keys')
+def save_json_file_case(work_dir):
+    """Save JSON file with 1k keys."""
+    file_path = os.path.join(work_dir, 'save.json')
+    data = {'key_{}'.format(i): i for i in range(1000)}
+    return lambda: Util.save_json_file(file_path, data)
+
+
+@case('utils.Util.str_to_date')
+def str_to_date_case(work_dir):
+    """Convert ISO date string."""
+    return lambda: Util.str_to_date('2020-04-18', '%Y-%m-%d')
+
+
+@case('utils.Util.date_to_str')
+def date_to_str_case(work_dir):
+    """Convert date to ISO string."""
+    date = datetime.date(2020, 4, 18)
+    return lambda: Util.date_to_str(date, '%Y-%m-%d')
+
+
+def date_strings(count: int, unique: int, date_fmt: str) -> list:
+    """Return count date strings of unique days (random order if days are repeated)."""
+    first_day = datetime.date(2000, 1, 1)
+    days = [(first_day + datetime.timedelta(days=i)).strftime(date_fmt) for i in range(unique)]
+    if unique >= count:
+        return days[:count]
+    rand = random.Random(0)
+    return [rand.choice(days) for __ in range(count)]
+
+
+@case('utils.strptime.10k_dates')
+def strptime_case(work_dir):
+    """datetime.strptime baseline of Util.str_to_dates."""
+    values = date_strings(10000, 3650, '%d.%m.%Y')
+    strptime = datetime.datetime.strptime
+    return lambda: [strptime(value, '%d.%m.%Y').date() for value in values]
+
+
+@case('utils.Util.str_to_dates.10k_dates')
+def str_to_dates_case(work_dir):
+    """Convert 10k date strings of 3650 unique days."""
+    values = date_strings(10000, 3650, '%d.%m.%Y')
+    return lambda: Util.str_to_dates(values, '%d.%m.%Y')
+
+
+@case('utils.Util.str_to_dates.10k_unique_dates')
+def str_to_dates_unique_case(work_dir):
+    """Convert 10k unique date strings (more than DATE_CACHE_SIZE, no memo hits)."""
+    values = date_strings(10000, 10000, '%d.%m.%Y')
+    return lambda: Util.str_to_dates(values, '%d.%m.%Y')
+
+
+@case('utils.strptime.1m_dates')
+def strptime_1m_case(work_dir):
+    """datetime.strptime baseline of Util.str_to_dates over 1M values."""
+    values = date_strings(1000000, 3650, '%d.%m.%Y')
+    strptime = datetime.datetime.strptime
+    return lambda: [strptime(value, '%d.%m.%Y').date() for value in values]
+
+
+@case('utils.Util.str_to_dates.1m_dates')
+def str_to_dates_1m_case(work_dir):
+    """Convert 1M date strings of 3650 unique days."""
+    values = date_strings(1000000, 3650, '%d.%m.%Y')
+    return lambda: Util.str_to_dates(values, '%d.%m.%Y')
+
+
+if numpy is not None:
+    @case('utils.Util.str_to_datetime64.1m_dates')
+    def str_to_datetime64_1m_case(work_dir):
+        """Vectorized conversion of 1M unique date strings."""
+        column = numpy.array(date_strings(1000000, 1000000, '%d.%m.%Y'))
+        return lambda: Util.str_to_datetime64(column, '%d.%m.%Y')
+
+    @case('utils.Util.str_to_datetime64.10k_dates')
+    def str_to_datetime64_case(work_dir):
+        """Vectorized conversion of 10k unique date strings."""
+        column = numpy.array(date_strings(10000, 10000, '%d.%m.%Y'))
+        return lambda: Util.str_to_datetime64(column, '%d.%m.%Y')
+
+    @case('utils.Util.datetime64_to_str.10k_dates')
+    def datetime64_to_str_case(work_dir):
+        """Vectorized formatting of 10k dates."""
+        dates, __ = Util.str_to_datetime64(numpy.array(date_strings(10000, 10000, '%d.%m.%Y')), '%d.%m.%Y')
+        return lambda: Util.datetime64_to_str(dates, '%d.%m.%Y')
+
+
+@case('utils.Util.public_attrs')
+def public_attrs_case(work_dir):
+    """Public attributes of a Config instance."""
+    config = quiet_config()
+    return config.public_attrs
+
+
+def legacy_public_attrs(self) -> dict:
+    """Util.public_attrs implementation without classification cache."""
+    result_dict = dict()
+    for attr in dir(self):
+        if attr.startswith('_'):
+            continue
+        if hasattr(self.__class__, attr) and callable(getattr(self.__class__, attr)):
+            continue
+        attr_value = getattr(self.__class__, attr) if hasattr(self.__class__, attr) else self.__getattribute__(attr)
+        if isinstance(attr_value, property):
+            continue
+        result_dict[attr] = attr_value
+    return result_dict
+
+
+def attrs_holder(members: int = 200, fields: int = 20):
+    """Return Util subclass instance with members inherited methods and fields descriptors."""
+    base_attrs = {'method_{}'.format(i): lambda self: None for i in range(members)}
+    base = type('Base', (Util,), base_attrs)
+    attrs = {'field_{}'.format(i): descriptors.StringType('field_{}'.format(i)) for i in range(fields)}
+    instance = type('Child', (base,), attrs)()
+    instance.update({'FIELD_{}'.format(i): 'value' for i in range(fields)})
+    return instance
+
+
+@case('utils.public_attrs.uncached.200_methods')
+def legacy_public_attrs_case(work_dir):
+    """public_attrs without classification cache (Util.public_attrs baseline)."""
+    instance = attrs_holder()
+    return lambda: legacy_public_attrs(instance)
+
+
+@case('utils.Util.public_attrs.200_methods')
+def cached_public_attrs_case(work_dir):
+    """Public attributes of a class with many inherited methods."""
+    return attrs_holder().public_attrs
+
+
+@case('utils.Util.update.200_methods')
+def update_case(work_dir):
+    """Update 20 descriptor fields of a class with many inherited methods."""
+    instance = attrs_holder()
+    values = {'FIELD_{}'.format(i): 'value' for i in range(20)}
+    return lambda: instance.update(values)
+
+
+@case('config.Config.load')
+def config_load_case(work_dir):
+    """Load JSON config file."""
+    file_path = os.path.join(work_dir, 'config.json')
+    config = quiet_config()
+    config.create_template(file_path)
+    return lambda: config.load(file_path)
+
+
+@case('config.Config.init')
+def config_init_case(work_dir):
+    """Create Config (with Logging) from JSON config file."""
+    file_path = os.path.join(work_dir, 'config.json')
+    quiet_config().create_template(file_path)
+    return lambda: quiet_config(file_path)
+
+
+CSV_SCHEMA = {'id': descriptors.IntType, 'uid': descriptors.UuidStringType, 'day': '%Y-%m-%d',
+              'flag': descriptors.BoolType}
+CSV_FIELDNAMES = ['id', 'name', 'uid', 'day', 'flag']
+
+
+def csv_rows(count: int = 10000):
+    """Yield typed CSV rows."""
+    first_day = datetime.date(2000, 1, 1)
+    for i in range(count):
+        yield {'id': i, 'name': 'name {}'.format(i), 'uid': UUID_VALUE,
+               'day': first_day + datetime.timedelta(days=i % 3650), 'flag': i % 2 == 0}
+
+
+def csv_file(work_dir: str) -> str:
+    """Create 10k rows CSV file, return its path."""
+    file_path = os.path.join(work_dir, 'read.csv')
+    if not os.path.exists(file_path):
+        Util.save_csv_file(file_path, csv_rows(), CSV_FIELDNAMES, CSV_SCHEMA)
+    return file_path
+
+
+class CsvRecord:
+    """Typed record validated by descriptors (manual conversion baseline)."""
+
+    id = descriptors.IntType('id')  # noqa: A003
+    uid = descriptors.UuidStringType('uid')
+
+
+@case('utils.csv.DictReader.10k_rows')
+def dict_reader_case(work_dir):
+    """csv.DictReader with manual conversion and validation (Util.read_csv_gen baseline)."""
+    file_path = csv_file(work_dir)
+    strptime = datetime.datetime.strptime
+
+    def run():
+        with open(file_path, newline='') as f:
+            for row in csv.DictReader(f):
+                record = CsvRecord()
+                record.id = int(row['id'])
+                record.uid = row['uid']
+                row['id'] = record.id
+                row['day'] = strptime(row['day'], '%Y-%m-%d').date()
+                row['flag'] = row['flag'].lower() in ('1', 'true')
+    return run
+
+
+@case('utils.Util.read_csv_gen.10k_rows')
+def read_csv_gen_case(work_dir):
+    """Read typed rows with compiled column converters."""
+    file_path = csv_file(work_dir)
+    return lambda: sum(1 for __ in Util.read_csv_gen(file_path, CSV_SCHEMA))
+
+
+@case('utils.Util.save_csv_file.10k_rows')
+def save_csv_file_case(work_dir):
+    """Save 10k typed rows."""
+    file_path = os.path.join(work_dir, 'save.csv')
+    rows = list(csv_rows())
+    return lambda: Util.save_csv_file(file_path, rows, CSV_FIELDNAMES, CSV_SCHEMA)
+
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+
+def level_records(descriptor, count: int = 100000):
+    """Return function that creates count records with levels parsed from text."""
+    class Record:
+        level = descriptor
+
+        def __init__(self, level):
+            self.level = level
+
+    def build():
+        # values are split from a line, so every record gets its own str object like after file parsing
+        return [Record(' {} '.format(LEVELS[i % len(LEVELS)]).strip()) for i in range(count)]
+    return build
+
+
+@memory_case('descriptors.StringType.100k_levels')
+def string_levels_case(work_dir):
+    """Create records with StringType levels (EnumStringType baseline)."""
+    return level_records(descriptors.StringType('level'))
+
+
+@memory_case('descriptors.EnumStringType.100k_levels')
+def enum_levels_case(work_dir):
+    """Create records with interned EnumStringType levels."""
+    return level_records(descriptors.EnumStringType('level', values=LEVELS))
+
+
+@memory_case('descriptors.EnumStringType.codes.100k_levels')
+def enum_codes_levels_case(work_dir):
+    """Create records with EnumStringType levels stored as codes."""
+    return level_records(descriptors.EnumStringType('level', values=LEVELS, as_codes=True))
+
+
+def enum_set_get(as_codes: bool):
+    """Return function that sets and gets EnumStringType value."""
+    class Record:
+        level = descriptors.EnumStringType('level', values=LEVELS, as_codes=as_codes)
+
+    record = Record()
+
+    def run():
+        record.level = 'ERROR'
+        return record.level
+    return run
+
+
+@case('descriptors.EnumStringType.set_get')
+def enum_case(work_dir):
+    """Set and get interned EnumStringType value."""
+    return enum_set_get(as_codes=False)
+
+
+@case('descriptors.EnumStringType.as_codes.set_get')
+def enum_codes_case(work_dir):
+    """Set and get EnumStringType value stored as code."""
+    return enum_set_get(as_codes=True)
+
+
+def tenant_configs(work_dir: str, files: int = 100) -> str:
+    """Create directory of tenant config files (every 10th is invalid), return its path."""
+    directory = os.path.join(work_dir, 'tenants')
+    if not os.path.exists(directory):
+        os.mkdir(directory)
+        for idx in range(files):
+            config = {'LOG_LVL': 'INFO', 'LOG_FMT': '%(message)s', 'LOG_DATE_FMT': '%H:%M:%S'}
+            if idx % 10 == 0:
+                config['LOG_LVL'] = 1
+            Config.save_json_file(os.path.join(directory, 'tenant_{}.json'.format(idx)), config)
+    return directory
+
+
+@case('config.Config.per_file.100_files')
+def config_per_file_case(work_dir):
+    """Validate files by creating Config instances (ConfigSchema.validate_dir baseline)."""
+    directory = tenant_configs(work_dir)
+    file_paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))]
+
+    def run():
+        for file_path in file_paths:
+            try:
+                quiet_config(file_path)
+            except (TypeError, ValueError):
+                continue
+    return run
+
+
+@case('config.ConfigSchema.validate_dir.100_files')
+def validate_dir_case(work_dir):
+    """Validate directory of config files with compiled schema (one process)."""
+    directory = tenant_configs(work_dir)
+    schema = Config.schema()
+    return lambda: schema.validate_dir(directory, workers=1)
+
+
+def measure(func, repeat: int) -> dict:
+    """Return per call best and median times (seconds) of func."""
+    timer = timeit.Timer(func)
+    number, __ = timer.autorange()
+    times = sorted(elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number))
+    return {'best': times[0], 'median': times[len(times) // 2], 'number': number, 'repeat': repeat, 'unit': 's'}
+
+
+def measure_memory(func, repeat: int) -> dict:
+    """Return smallest and median memory (bytes) allocated by the result of func."""
+    sizes = list()
+    for __ in range(repeat):
+        tracemalloc.start()
+        try:
+            # result is alive while memory is measured
+            result = func()
+            sizes.append(tracemalloc.get_traced_memory()[0])
+        finally:
+            tracemalloc.stop()
+        del result
+    sizes.sort()
+    return {'best': sizes[0], 'median': sizes[len(sizes) // 2], 'number': 1, 'repeat': repeat, 'unit': 'B'}
+
+
+def format_value(result: dict) -> str:
+    """Return best result value with unit (microseconds or KiB)."""
+    if result.get('unit', 's') == 'B':
+        return '{:>11.1f}KiB'.format(result['best'] / 1024)
+    return '{:>12.3f}us'.format(result['best'] * 1e6)
+
+
+def run_cases(name_filter: str, repeat: int) -> dict:
+    """Run benchmark cases which names contain name_filter."""
+    results = dict()
+    work_dir = tempfile.mkdtemp()
+    try:
+        for name, factory in sorted(CASES.items()):
+            if name_filter in name:
+                results[name] = measure(factory(work_dir), repeat)
+        for name, factory in sorted(MEMORY_CASES.items()):
+            if name_filter in name:
+                results[name] = measure_memory(factory(work_dir), repeat)
+    finally:
+        shutil.rmtree(work_dir)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print current / baseline ratio of best results, return names of regressed cases."""
+    regressions = list()
+    for name, result in results.items():
+        if name not in baseline:
+            print('{name:<45} {value} {ratio:>8}'.format(name=name, value=format_value(result), ratio='new'))
+            continue
+        ratio = result['best'] / baseline[name]['best']
+        mark = ' REGRESSION' if ratio > threshold else ''
+        print('{name:<45} {value} {ratio:>7.2f}x{mark}'.format(
+            name=name, value=format_value(result), ratio=ratio, mark=mark))
+        if mark:
+            regressions.append(name)
+    return regressions
+
+
+def main():  # pragma: no cover
+    """Run benchmarks, save and compare results."""
+    args = parse_args()
+    results = run_cases(args.filter, args.repeat)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': datetime.datetime.now().isoformat(),
+        'results': results,
+    }
+    if args.output:
+        Util.save_json_file(args.output, report)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('{count} case(s) slower than {threshold}x of the baseline.'.format(
+                count=len(regressions), threshold=args.threshold))
+            sys.exit(1)
+    else:
+        for name, result in results.items():
+            print('{name:<45} {value}'.format(name=name, value=format_value(result)))
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
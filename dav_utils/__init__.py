@@ -2,12 +2,30 @@
 
 """Set of tools that often have to reproduce in Python scripts.
 
+Submodules are imported on first attribute access (PEP 562),
+so `import dav_utils` stays cheap for short-lived scripts.
+
 for additional info see README.md
 """
 
 __version__ = '0.2.5'
 __all__ = [
-    'descriptors', 'config', 'logger', 'utils'
+    'descriptors', 'config', 'logger', 'utils', 'metrics', 'export', 'tracing'
 ]
 
 __author__ = 'Aleksey Devyatkin <devyatkin.av@ya.ru>'
+
+
+def __getattr__(name):
+    """Import submodule on first access."""
+    if name in __all__:
+        import importlib
+        module = importlib.import_module('.' + name, __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError('module {module} has no attribute {name}'.format(module=__name__, name=name))
+
+
+def __dir__():
+    """Return module attributes including not yet imported submodules."""
+    return sorted(set(globals()) | set(__all__))
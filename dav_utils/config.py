@@ -1,12 +1,400 @@
 # -*- coding: utf-8 -*
 """Extendable config template."""
 
+import functools
 import io
 import json
+import os
+import threading
+import weakref
+from types import MappingProxyType
 
-from .descriptors import StringType
+from .descriptors import StringType, TypeChecker
 from .logger import Logging
-from .utils import Util
+from .utils import Util, _class_attrs, io_executor
+
+CONFIG_EXTENSIONS = frozenset(['.json', '.ini', '.toml'])
+
+# config class -> {(schema class, allow_unknown): ConfigSchema}
+_schema_cache = weakref.WeakKeyDictionary()
+
+
+def _import_toml():
+    """Import tomllib (python 3.11+) or tomli on first use."""
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ImportError('tomllib (python 3.11+) or tomli is required for .toml config files.')
+    return tomllib
+
+
+def parse_value(value: str, value_type: type = None):
+    """Convert str value from INI file, environment or command line to value_type.
+
+    Value is decoded as a JSON literal (numbers, true/false, null, lists, objects)
+    if value_type is a known non-str type, otherwise it is returned as is.
+    """
+    if value_type is None or value_type is str:
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _parse_values(items, value_types: dict = None) -> dict:
+    """Return {key: value} of str items decoded by parse_value with value_types of lowered keys."""
+    value_types = value_types or {}
+    return {key: parse_value(value, value_types.get(key.lower())) for key, value in items}
+
+
+def load_config_file(config_file: str, extensions: frozenset = CONFIG_EXTENSIONS, value_types: dict = None) -> dict:
+    """Load configuration attributes from a .json, .ini or .toml (tomllib or tomli is required) config_file.
+
+    INI sections are merged into one flat dictionary,
+    values are decoded by parse_value with value_types {key: type} (ex: ConfigSchema().value_types).
+    """
+    config_file = Util.check_exists(config_file)
+    Util.check_extension(config_file, extensions)
+    __, file_ext = os.path.splitext(config_file)
+
+    if file_ext == '.toml':
+        with io.open(config_file, mode='rb') as toml_config:
+            return _import_toml().load(toml_config)
+
+    with io.open(config_file, mode='r', encoding='utf-8') as text_config:
+        if file_ext == '.ini':
+            import configparser
+            parser = configparser.ConfigParser(interpolation=None)
+            parser.read_file(text_config)
+            file_config = _parse_values(parser.defaults().items(), value_types)
+            for section in parser.sections():
+                file_config.update(_parse_values(parser.items(section), value_types))
+            return file_config
+        return json.load(text_config)
+
+
+class ConfigSources:
+    """Layered configuration sources.
+
+    Layers are merged in order, later layers override earlier ones:
+        defaults: dictionary of default values
+        files: list of .json, .ini, .toml config files
+        env_prefix: environment variables with the prefix (APP_LOG_LVL -> log_lvl)
+        overrides: dictionary or list of 'key=value' strings (ex: command line arguments)
+    Keys are case insensitive (lowered). Merged snapshot is computed once and cached.
+    value_types: {key: type} for str values of INI files, environment and 'key=value' overrides
+    (see parse_value, default - value_types passed to merge, Config passes its schema value_types).
+    loader: function that loads a config file to a dictionary
+    (default - loader passed to merge, Config passes its load method)
+    """
+
+    def __init__(self, defaults: dict = None, files: list = None, env_prefix: str = None, overrides=None,
+                 value_types: dict = None, loader=None):
+        """Set configuration layers."""
+        self.defaults = dict(defaults or {})
+        self.files = list(files or [])
+        self.env_prefix = env_prefix
+        self.overrides = overrides or {}
+        self.value_types = value_types
+        self.loader = loader
+        self.__snapshot = None
+
+    def copy(self):
+        """Return sources with the same layers and without cached snapshot."""
+        return ConfigSources(self.defaults, self.files, self.env_prefix, self.overrides, self.value_types, self.loader)
+
+    def env_layer(self, environ=os.environ, value_types: dict = None) -> dict:
+        """Return variables with env_prefix from environ (prefix is stripped)."""
+        if not self.env_prefix:
+            return {}
+        prefix = self.env_prefix.upper()
+        return _parse_values(((key[len(prefix):], value) for key, value in environ.items()
+                              if key.upper().startswith(prefix) and len(key) > len(prefix)),
+                             self.value_types if self.value_types is not None else value_types)
+
+    def overrides_layer(self, value_types: dict = None) -> dict:
+        """Return overrides as a dictionary."""
+        if isinstance(self.overrides, dict):
+            return dict(self.overrides)
+        items = list()
+        for override in self.overrides:
+            key, sep, value = override.partition('=')
+            if not sep:
+                raise ValueError('{override} is not a key=value override.'.format(override=override))
+            items.append((key.strip(), value))
+        return _parse_values(items, self.value_types if self.value_types is not None else value_types)
+
+    def layers(self, loader=None, value_types: dict = None):
+        """Yield the layers in order (loader and value_types are used if the sources have none)."""
+        if self.value_types is not None:
+            value_types = self.value_types
+        loader = self.loader or loader
+        yield self.defaults
+        for config_file in self.files:
+            if loader is not None:
+                yield loader(config_file)
+            else:
+                yield load_config_file(config_file, value_types=value_types)
+        yield self.env_layer(value_types=value_types)
+        yield self.overrides_layer(value_types)
+
+    def merge(self, loader=None, value_types: dict = None) -> dict:
+        """Read and merge all layers (see layers)."""
+        merged = dict()
+        for layer in self.layers(loader, value_types):
+            merged.update({key.lower(): value for key, value in layer.items()})
+        return merged
+
+    def snapshot(self, loader=None, value_types: dict = None) -> MappingProxyType:
+        """Return read-only view of merged configuration (computed on first call, see layers)."""
+        if self.__snapshot is None:
+            self.__snapshot = self.merge(loader, value_types)
+        return MappingProxyType(self.__snapshot)
+
+    def refresh(self, loader=None, value_types: dict = None) -> MappingProxyType:
+        """Drop cached snapshot and merge the layers again (see layers)."""
+        self.__snapshot = None
+        return self.snapshot(loader, value_types)
+
+
+class FrozenDict(dict):
+    """Read-only hashable dictionary."""
+
+    __slots__ = ()
+
+    def __hash__(self):
+        """Hash of the dictionary items."""
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        """Pickle as a plain dictionary of items."""
+        return self.__class__, (dict(self),)
+
+    def _readonly(self, *args, **kwargs):
+        """Raise TypeError on any modification."""
+        raise TypeError('FrozenDict is read-only.')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze_value(value):
+    """Convert value to a hashable one (list -> tuple, dict -> FrozenDict, set -> frozenset)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_value(item) for item in value)
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze_value(item)) for key, item in value.items())
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def thaw_value(value):
+    """Convert value made by freeze_value back (tuple -> list, FrozenDict -> dict, frozenset -> set)."""
+    if isinstance(value, tuple):
+        return [thaw_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: thaw_value(item) for key, item in value.items()}
+    if isinstance(value, frozenset):
+        return set(value)
+    return value
+
+
+class FrozenConfig:
+    """Read-only hashable snapshot of Config public attributes.
+
+    Snapshot has no locks or Logging instance, so it can be shared between threads
+    without copying and pickles as a config class reference and a tuple of items.
+    """
+
+    __slots__ = ('_config_class', '_items', '_attrs', '_hash')
+
+    def __init__(self, config_class, attrs: dict):
+        """Freeze attrs (see freeze_value) of a config_class instance."""
+        items = tuple(sorted((attr, freeze_value(value)) for attr, value in attrs.items()))
+        object.__setattr__(self, '_config_class', config_class)
+        object.__setattr__(self, '_items', items)
+        object.__setattr__(self, '_attrs', dict(items))
+        object.__setattr__(self, '_hash', None)
+
+    def __getattr__(self, name):
+        """Return frozen config attribute."""
+        if name in FrozenConfig.__slots__:
+            raise AttributeError(name)
+        try:
+            return self._attrs[name]
+        except KeyError:
+            raise AttributeError('{cls} has no attribute {name}.'.format(cls=self._config_class.__name__, name=name))
+
+    def __setattr__(self, name, value):
+        """Raise AttributeError, snapshot is read-only."""
+        raise AttributeError('FrozenConfig is read-only.')
+
+    def __delattr__(self, name):
+        """Raise AttributeError, snapshot is read-only."""
+        raise AttributeError('FrozenConfig is read-only.')
+
+    def __eq__(self, other):
+        """Compare config classes and attributes."""
+        if not isinstance(other, FrozenConfig):
+            return NotImplemented
+        return self._config_class is other._config_class and self._items == other._items
+
+    def __hash__(self):
+        """Hash of config class and attributes (computed once)."""
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash((self._config_class, self._items)))
+        return self._hash
+
+    def __reduce__(self):
+        """Pickle config class reference and attributes only."""
+        return _restore_frozen_config, (self._config_class, self._items)
+
+    def __repr__(self):
+        """Return representation with attributes."""
+        return '{cls}.freeze({attrs})'.format(cls=self._config_class.__name__, attrs=self._attrs)
+
+    def as_dict(self) -> dict:
+        """Return dictionary of (frozen) attributes."""
+        return dict(self._attrs)
+
+    def thaw(self):
+        """Create new mutable config_class instance (with its own Logging) from the snapshot.
+
+        config_class should accept sources keyword argument (as Config does).
+        """
+        attrs = {attr: thaw_value(value) for attr, value in self._items}
+        return self._config_class(sources=ConfigSources(defaults=attrs))
+
+    def logging(self) -> Logging:
+        """Create new Logging instance with the snapshot log parameters."""
+        return Logging(self.log_date_fmt, self.log_fmt, self.log_lvl)
+
+
+def _restore_frozen_config(config_class, items):
+    """Unpickle FrozenConfig."""
+    return FrozenConfig(config_class, dict(items))
+
+
+class SchemaError(ValueError):
+    """Configuration does not match the schema.
+
+    errors: dictionary {key: error message}
+    """
+
+    def __init__(self, errors: dict):
+        """Keep all validation errors."""
+        self.errors = errors
+        super().__init__('; '.join('{key}: {err}'.format(key=key, err=err) for key, err in errors.items()))
+
+
+class ConfigSchema:
+    """Validation schema compiled from config class TypeChecker descriptors.
+
+    Whole configuration dictionary is checked in one pass and all errors are reported.
+    Keys are case insensitive (as in Util.update). Keys that are not descriptors or
+    public class attributes are reported as unknown (unless allow_unknown is set).
+    """
+
+    def __init__(self, config_class, allow_unknown: bool = False):
+        """Compile descriptors of config_class."""
+        # weak reference, so the schema cache does not keep config classes alive
+        self.__config_class = weakref.ref(config_class)
+        self.allow_unknown = allow_unknown
+        self.checkers = dict()
+        self.value_types = dict()
+        for class_ in reversed(config_class.__mro__):
+            for name, value in vars(class_).items():
+                if isinstance(value, TypeChecker):
+                    self.checkers[name] = value.compile_check()
+                    self.value_types[name] = value.value_type
+        self.class_attrs = _class_attrs(config_class)
+        self.known = frozenset(self.checkers) | frozenset(self.class_attrs.class_values)
+        self.validate = self.__compile()
+
+    @property
+    def config_class(self):
+        """Config class of the schema."""
+        return self.__config_class()
+
+    @classmethod
+    def for_class(cls, config_class, allow_unknown: bool = False):
+        """Return cached schema of config_class (compiled again after the class attributes change)."""
+        schemas = _schema_cache.get(config_class)
+        if schemas is None:
+            schemas = _schema_cache[config_class] = dict()
+        schema = schemas.get((cls, allow_unknown))
+        if schema is None or schema.class_attrs is not _class_attrs(config_class):
+            schema = schemas[cls, allow_unknown] = cls(config_class, allow_unknown)
+        return schema
+
+    def __compile(self):
+        """Build validate function with schema bound to local names."""
+        checkers = self.checkers
+        known = self.known
+        allow_unknown = self.allow_unknown
+        methods = self.class_attrs.methods
+
+        def validate(config: dict) -> dict:
+            """Return dictionary {key: error message} of config errors."""
+            if not isinstance(config, dict):
+                return {'': '{val} is not a {val_type}'.format(val=config, val_type=dict)}
+            errors = dict()
+            for key, value in config.items():
+                attr = key.lower()
+                checker = checkers.get(attr)
+                if checker is not None:
+                    error = checker(value)
+                    if error is not None:
+                        errors[key] = error
+                elif key.startswith('_') or key in methods:
+                    errors[key] = 'is not a public attribute.'
+                elif not allow_unknown and attr not in known:
+                    errors[key] = 'is unknown.'
+            return errors
+        return validate
+
+    def check(self, config: dict):
+        """Raise SchemaError with all config errors."""
+        errors = self.validate(config)
+        if errors:
+            raise SchemaError(errors)
+
+    def validate_file(self, config_file: str) -> dict:
+        """Return errors of config_file (loading error is reported with '' key)."""
+        try:
+            config = load_config_file(config_file, value_types=self.value_types)
+        except (AssertionError, ImportError, OSError, ValueError) as err:
+            return {'': 'can not be loaded: {err}'.format(err=str(err) or 'unsupported extension')}
+        return self.validate(config)
+
+    def validate_dir(self, directory: str, workers: int = None) -> dict:
+        """Validate config files of directory in a process pool.
+
+        workers: number of processes (None - number of CPUs, 1 - no pool)
+        config_class should be importable by the worker processes.
+        Return dictionary {config_file: errors} for files with errors.
+        """
+        config_files = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                              if os.path.splitext(name)[1] in CONFIG_EXTENSIONS)
+        if workers == 1:
+            results = map(self.validate_file, config_files)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(config_files) // (4 * (workers or os.cpu_count() or 1)))
+                results = list(pool.map(functools.partial(_validate_file, self.config_class, self.allow_unknown),
+                                        config_files, chunksize=chunksize))
+        return {config_file: errors for config_file, errors in zip(config_files, results) if errors}
+
+
+def _validate_file(config_class, allow_unknown: bool, config_file: str) -> dict:
+    """Validate config_file in a worker process."""
+    return ConfigSchema.for_class(config_class, allow_unknown).validate_file(config_file)
 
 
 class Config(Util):
@@ -18,22 +406,39 @@ class Config(Util):
         log_lvl: log level (logging.DEBUG, logging.INFO and etc.)
 
     __extensions: acceptable configuration file extensions
+
+    Configuration can be loaded from one config_file or from layered sources
+    (see ConfigSources). Config files can be watched for changes (see watch),
+    changed values are validated by descriptors and applied atomically,
+    subscribers get a diff.
     """
 
-    __extensions = frozenset(['.json'])
+    __extensions = CONFIG_EXTENSIONS
     log_date_fmt = StringType('log_date_fmt')
     log_fmt = StringType('log_fmt')
     log_lvl = StringType('log_lvl')
 
-    def __init__(self, config_file: str = None):
-        """Load configuration parameters from config_file."""
+    def __init__(self, config_file: str = None, sources: ConfigSources = None):
+        """Load configuration parameters from config_file or layered sources.
+
+        config_file is a shortcut for ConfigSources(files=[config_file]).
+        sources are copied, so they can be shared by several configs.
+        Config files are read by load method (it can be overridden).
+        """
+        assert not (config_file and sources is not None), 'Use config_file or sources, not both.'
         self.log_date_fmt = '%H:%M:%S'
         self.log_fmt = '%(asctime)s.%(msecs)d|%(levelname).1s|%(message)s'
         self.log_lvl = 'DEBUG'
 
-        if config_file:
-            file_config = self.load(config_file)
-            self.update(file_config)
+        if sources is None:
+            sources = ConfigSources(files=[config_file] if config_file else None)
+        else:
+            sources = sources.copy()
+        self.__sources = sources
+        self.__subscribers = list()
+        self.__reload_lock = threading.Lock()
+        self.__watch_stop = None
+        self.update(sources.snapshot(self.load, self.schema(allow_unknown=True).value_types))
 
         self.__logger = Logging(self.log_date_fmt, self.log_fmt, self.log_lvl)
 
@@ -42,15 +447,127 @@ class Config(Util):
         """Script logger instance."""
         return self.__logger
 
+    def __getstate__(self):
+        """Return state for pickle and copy without reload lock, watcher and subscribers."""
+        state = dict(self.__dict__)
+        state['_Config__reload_lock'] = None
+        state['_Config__watch_stop'] = None
+        state['_Config__subscribers'] = list()
+        return state
+
+    def __setstate__(self, state):
+        """Restore state with a new reload lock."""
+        self.__dict__.update(state)
+        self.__reload_lock = threading.Lock()
+
+    @property
+    def sources(self):
+        """Configuration sources."""
+        return self.__sources
+
     def load(self, config_file: str):
         """Load configuration attributes from a config_file."""
-        config_file = self.check_exists(config_file)
-        self.check_extension(config_file, self.__extensions)
+        return load_config_file(config_file, self.__extensions, self.schema(allow_unknown=True).value_types)
+
+    async def async_load(self, config_file: str):
+        """Load configuration attributes from a config_file without blocking the event loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(io_executor(), self.load, config_file)
+
+    def subscribe(self, callback):
+        """Call callback(config, diff) after each applied config_file change.
+
+        diff: dictionary {attr: (old_value, new_value)} of changed public attrs.
+        """
+        self.__subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Remove callback from config_file change subscribers."""
+        self.__subscribers.remove(callback)
+
+    def reload(self) -> dict:
+        """Reload configuration sources and apply changed attributes.
+
+        New values are validated on a copy of the config first, so nothing is
+        changed if any of them is rejected by a descriptor.
+        Return diff of changed public attrs (see subscribe).
+        """
+        file_config = self.__sources.refresh(self.load, self.schema(allow_unknown=True).value_types)
+        with self.__reload_lock:
+            shadow = object.__new__(self.__class__)
+            shadow.__dict__.update(self.__dict__)
+            shadow.update(file_config)
+            old_attrs = self.public_attrs()
+            new_attrs = shadow.public_attrs()
+            diff = {attr: (old_attrs.get(attr), value) for attr, value in new_attrs.items()
+                    if attr not in old_attrs or old_attrs[attr] != value}
+            if not diff:
+                return diff
+            self.__dict__.update({attr: value for attr, value in shadow.__dict__.items()
+                                  if self.__dict__.get(attr) is not value})
+
+        if 'log_lvl' in diff:
+            self.log.set_level(self.log_lvl)
+        self.log.info('Configuration reloaded, changed: {attrs}'.format(attrs=', '.join(sorted(diff))))
+        for callback in list(self.__subscribers):
+            try:
+                callback(self, diff)
+            except Exception as err:
+                self.log.error('Config subscriber {callback} failed: {err}'.format(callback=callback, err=err))
+        return diff
+
+    def watch(self, interval: float = 1.0):
+        """Start a background thread that reloads configuration when config files change.
+
+        Changes are detected by polling os.stat (mtime, size, inode) every interval seconds.
+        """
+        assert self.__sources.files, 'Config has no config files to watch.'
+        if self.__watch_stop is not None:
+            return
+        self.__watch_stop = threading.Event()
+        thread = threading.Thread(target=self.__watch,
+                                  args=(self.__watch_stop, interval, self.__file_signature()),
+                                  name='dav_utils_config_watch', daemon=True)
+        thread.start()
+
+    def stop_watching(self):
+        """Stop config_file watching thread."""
+        if self.__watch_stop is not None:
+            self.__watch_stop.set()
+            self.__watch_stop = None
+
+    def __file_signature(self):
+        """Return (mtime, size, inode) of each config file or None if any of them is missing."""
+        signature = list()
+        for config_file in self.__sources.files:
+            try:
+                stat = os.stat(self.check_exists(config_file))
+            except FileNotFoundError:
+                return None
+            signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(signature)
+
+    def __watch(self, stop: threading.Event, interval: float, last_signature: tuple):
+        """Poll config files and reload them on change until stop is set."""
+        while not stop.wait(interval):
+            signature = self.__file_signature()
+            if signature is None or signature == last_signature:
+                continue
+            last_signature = signature
+            try:
+                self.reload()
+            except (AssertionError, OSError, TypeError, ValueError) as err:
+                self.log.error('Config {files} reload failed: {err}'.format(files=self.__sources.files, err=err))
 
-        with io.open(config_file, mode='r', encoding='utf-8') as json_config:
-            file_config = json.load(json_config)
+    @classmethod
+    def schema(cls, allow_unknown: bool = False) -> ConfigSchema:
+        """Return validation schema compiled from the class descriptors."""
+        return ConfigSchema.for_class(cls, allow_unknown)
 
-        return file_config
+    def freeze(self) -> FrozenConfig:
+        """Return read-only hashable snapshot of the config public attributes."""
+        return FrozenConfig(self.__class__, self.public_attrs())
 
     def create_template(self, file_path: str):
         """Create JSON config file template."""
@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
 """Descriptors for extra type checking."""
 import functools
-import inspect
 import os
-from uuid import UUID
+import sys
+from types import SimpleNamespace
 
 
 class TypeChecker:
-    """Descriptor for type checking."""
+    """Descriptor for type checking.
+
+    nullable: None value is accepted too
+    """
+
+    nullable = False
 
     def __init__(self, name, value_type):
         """Set attribute name and checking value type."""
@@ -16,7 +21,7 @@ class TypeChecker:
 
     def __set__(self, instance, value):
         """Check that attribute value type equals value_type."""
-        if isinstance(value, self.value_type):
+        if isinstance(value, self.value_type) or (value is None and self.nullable):
             instance.__dict__[self.name] = value
         else:
             raise TypeError('{val} is not a {val_type}'.format(val=value, val_type=self.value_type))
@@ -25,6 +30,37 @@ class TypeChecker:
         """Return attribute value."""
         return instance.__dict__[self.name]
 
+    def compile_check(self):
+        """Return function that checks a value without an instance.
+
+        Function returns None for a valid value or an error message.
+        Plain type checks are compiled to isinstance, overridden __set__ is
+        called with a scratch instance.
+        """
+        if type(self).__set__ is TypeChecker.__set__:
+            return self._compile_type_check()
+
+        descriptor_set = self.__set__
+
+        def check(value):
+            try:
+                descriptor_set(SimpleNamespace(), value)
+            except (TypeError, ValueError, PermissionError) as err:
+                return str(err)
+            return None
+        return check
+
+    def _compile_type_check(self):
+        """Return compiled TypeChecker.__set__ check (see compile_check)."""
+        value_type = self.value_type
+        nullable = self.nullable
+
+        def check(value):
+            if isinstance(value, value_type) or (value is None and nullable):
+                return None
+            return '{val} is not a {val_type}'.format(val=value, val_type=value_type)
+        return check
+
 
 class StringType(TypeChecker):
     """Descriptor for string checking."""
@@ -69,49 +105,54 @@ class BoolType(TypeChecker):
 class NullableDictType(DictType):
     """Descriptor for dict checking."""
 
-    def __set__(self, instance, value):
-        """Check that attribute value type equals value_type."""
-        if isinstance(value, self.value_type) or value is None:
-            instance.__dict__[self.name] = value
-        else:
-            raise TypeError('{val} is not a {val_type}'.format(val=value, val_type=self.value_type))
+    nullable = True
 
 
 class NullableStringType(StringType):
     """Descriptor for nullable string checking."""
 
-    def __set__(self, instance, value):
-        """Check that attribute value type equals value_type."""
-        if isinstance(value, self.value_type) or value is None:
-            instance.__dict__[self.name] = value
-        else:
-            raise TypeError('{val} is not a {val_type}'.format(val=value, val_type=self.value_type))
+    nullable = True
 
 
 class NullableIntType(IntType):
     """Descriptor for nullable int checking."""
 
-    def __set__(self, instance, value):
-        """Check that attribute value type equals value_type."""
-        if isinstance(value, self.value_type) or value is None:
-            instance.__dict__[self.name] = value
-        else:
-            raise TypeError('{val} is not a {val_type}'.format(val=value, val_type=self.value_type))
+    nullable = True
 
 
 class UuidStringType(NullableStringType):
     """Check that string is a uuid-representation."""
 
+    def __init__(self, name):
+        """Keep uuid.UUID class (uuid is imported on descriptor creation, not on module import)."""
+        super().__init__(name)
+        from uuid import UUID
+        self.uuid_class = UUID
+
     def __set__(self, instance, value):
         """Check that attribute value can be converted to UUID."""
         try:
             if value:
-                UUID(value)
+                self.uuid_class(value)
         except (ValueError, AttributeError):
             raise TypeError('{val} is not a uuid string.'.format(val=value))
         else:
             super().__set__(instance, value)
 
+    def compile_check(self):
+        """Return function that checks a uuid string without an instance (see TypeChecker.compile_check)."""
+        uuid_class = self.uuid_class
+        check_type = self._compile_type_check()
+
+        def check(value):
+            try:
+                if value:
+                    uuid_class(value)
+            except (ValueError, AttributeError):
+                return '{val} is not a uuid string.'.format(val=value)
+            return check_type(value)
+        return check
+
 
 class WritableFile(StringType):
     """Check that file (value) is a writable file or can be created."""
@@ -136,25 +177,102 @@ class WritableFile(StringType):
             raise PermissionError(err)
 
 
-class HttpMethod(StringType):
-    """Check that value is one of http methods."""
+class EnumStringType(StringType):
+    """Check that string is one of allowed values.
+
+    values: allowed values (default - class attribute values)
+    as_codes: store value index in choices instead of the string (value is returned as string)
+    case_insensitive: values are compared in upper case (values should be in upper case)
+    Values are stored interned, so equal values of all instances are the same object.
+    Not allowed string value resets the attribute to None (as HttpMethod does).
+    """
+
+    values = frozenset()
+    case_insensitive = False
+    error_message = '{val} is not one of {values}.'
+
+    def __init__(self, name, values=None, as_codes: bool = False):
+        """Set allowed values and their codes."""
+        super().__init__(name)
+        if values is not None:
+            self.values = frozenset(values)
+        self.as_codes = as_codes
+        self.choices = tuple(sys.intern(value) for value in sorted(self.values))
+        self.codes = {value: code for code, value in enumerate(self.choices)}
+
+    def code(self, value) -> int:
+        """Return index of value in choices or raise TypeError."""
+        if not isinstance(value, str):
+            raise TypeError('{val} is not a {val_type}'.format(val=value, val_type=self.value_type))
+        code = self.codes.get(value.upper() if self.case_insensitive else value)
+        if code is None:
+            raise TypeError(self.error_message.format(val=value, values=', '.join(self.choices)))
+        return code
 
-    http_methods = frozenset(['GET', 'POST', 'PUT', 'HEAD', 'DELETE', 'PATCH', 'OPTIONS'])
+    def value_of(self, value) -> str:
+        """Return value as it is read from an instance or raise TypeError."""
+        return self.choices[self.code(value)]
 
     def __set__(self, instance, value):
-        """Check that value in allowed http methods."""
-        super().__set__(instance, value)
-        if value.upper() not in self.http_methods:
+        """Check that value is allowed and store interned value or its code."""
+        if value is None and self.nullable:
             instance.__dict__[self.name] = None
-            raise TypeError('{val} is not a HTTP Method.'.format(val=value))
+            return
+        try:
+            stored = self.code(value) if self.as_codes else self.value_of(value)
+        except TypeError:
+            if isinstance(value, str):
+                instance.__dict__[self.name] = None
+            raise
+        instance.__dict__[self.name] = stored
+
+    def compile_check(self):
+        """Return function that checks a value without an instance (see TypeChecker.compile_check)."""
+        code = self.code
+        nullable = self.nullable
+
+        def check(value):
+            if value is None and nullable:
+                return None
+            try:
+                code(value)
+            except TypeError as err:
+                return str(err)
+            return None
+        return check
+
+    def __get__(self, instance, class_):
+        """Return attribute value."""
+        value = instance.__dict__[self.name]
+        if self.as_codes and value is not None:
+            return self.choices[value]
+        return value
+
+
+class HttpMethod(EnumStringType):
+    """Check that value is one of http methods."""
+
+    http_methods = frozenset(['GET', 'POST', 'PUT', 'HEAD', 'DELETE', 'PATCH', 'OPTIONS'])
+    values = http_methods
+    case_insensitive = True
+    error_message = '{val} is not a HTTP Method.'
+
+    def value_of(self, value) -> str:
+        """Return value as is (case is kept) or raise TypeError."""
+        self.code(value)
+        return value
 
 
 def argument_type_checker(func):
     """Compare function argument type annotations with value types."""
+    arguments = None
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        arguments = inspect.getfullargspec(func).args
+        nonlocal arguments
+        if arguments is None:
+            import inspect  # imported on first use, inspect is slow to import
+            arguments = inspect.getfullargspec(func).args
         annotations = func.__annotations__
 
         if annotations:
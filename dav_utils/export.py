@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Columnar export of records validated by TypeChecker descriptors.
+
+numpy (structured arrays) and pyarrow (record batches, Parquet) are optional
+and imported on first use.
+"""
+
+import importlib
+import itertools
+import json
+import operator
+
+from .descriptors import TypeChecker
+
+# descriptor value_type: (numpy dtype, pyarrow type name)
+# str dtype width is computed per batch, nullable int columns are float64 (None -> nan) and
+# nullable str columns are object (None is kept) in numpy
+_COLUMN_TYPES = {
+    int: ('i8', 'int64'),
+    float: ('f8', 'float64'),
+    bool: ('?', 'bool_'),
+    str: ('U', 'string'),
+    list: ('O', 'string'),
+    dict: ('O', 'string'),
+}
+
+
+def _require(module_name: str):
+    """Import optional module on first use."""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        raise ImportError('{module} is required for this export.'.format(module=module_name))
+
+
+def record_descriptors(record_class) -> dict:
+    """Return {field: descriptor} of record_class TypeChecker descriptors (base classes first)."""
+    descriptors = dict()
+    for class_ in reversed(record_class.__mro__):
+        for name, value in vars(class_).items():
+            if isinstance(value, TypeChecker):
+                descriptors[name] = value
+    return descriptors
+
+
+class ColumnarExporter:
+    """Stream records to columnar batches.
+
+    record_class: class whose fields are declared with TypeChecker descriptors
+    fields: exported fields (default - all descriptors of record_class)
+    batch_size: max number of records kept in memory
+    Records can be record_class instances or dicts. Dict values are validated
+    by compiled descriptor checks (ValueError with the record index is raised).
+    list and dict fields are exported as JSON strings to Arrow.
+    """
+
+    def __init__(self, record_class, fields: list = None, batch_size: int = 65536):
+        """Derive column schema from record_class descriptors."""
+        descriptors = record_descriptors(record_class)
+        self.fields = list(fields or descriptors)
+        assert self.fields, '{cls} has no TypeChecker descriptors.'.format(cls=record_class.__name__)
+        self.batch_size = batch_size
+        self.descriptors = {field: descriptors[field] for field in self.fields}
+        self.checks = {field: descriptor.compile_check() for field, descriptor in self.descriptors.items()}
+        self.column_types = {field: _COLUMN_TYPES.get(descriptor.value_type, ('O', 'string'))
+                             for field, descriptor in self.descriptors.items()}
+
+    def batches(self, records):
+        """Yield {field: list of values} of batch_size records."""
+        records = iter(records)
+        offset = 0
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if not batch:
+                return
+            if isinstance(batch[0], dict):
+                self.__validate(batch, offset)
+                getters = {field: operator.methodcaller('get', field) for field in self.fields}
+            else:
+                getters = {field: operator.attrgetter(field) for field in self.fields}
+            yield {field: list(map(getter, batch)) for field, getter in getters.items()}
+            offset += len(batch)
+
+    def __validate(self, batch: list, offset: int):
+        """Check dict records values with compiled descriptor checks."""
+        for field, check in self.checks.items():
+            for idx, record in enumerate(batch):
+                error = check(record.get(field))
+                if error is not None:
+                    raise ValueError('record #{idx}: {field}: {err}'.format(idx=offset + idx, field=field, err=error))
+
+    def numpy_dtype(self, columns: dict):
+        """Return numpy structured dtype of a batch (str width is the longest value of the batch)."""
+        numpy = _require('numpy')
+        dtype = list()
+        for field in self.fields:
+            numpy_type = self.column_types[field][0]
+            descriptor = self.descriptors[field]
+            if numpy_type == 'U' and descriptor.nullable:
+                numpy_type = 'O'
+            elif numpy_type == 'U':
+                numpy_type = 'U{}'.format(max((len(value) for value in columns[field]), default=1))
+            elif numpy_type == 'i8' and descriptor.nullable:
+                numpy_type = 'f8'
+            dtype.append((field, numpy_type))
+        return numpy.dtype(dtype)
+
+    def numpy_batches(self, records):
+        """Yield numpy structured arrays of batch_size records."""
+        numpy = _require('numpy')
+        for columns in self.batches(records):
+            dtype = self.numpy_dtype(columns)
+            array = numpy.empty(len(columns[self.fields[0]]), dtype=dtype)
+            for field in self.fields:
+                values = columns[field]
+                if dtype[field].kind == 'f':
+                    values = [numpy.nan if value is None else value for value in values]
+                array[field] = values
+            yield array
+
+    def arrow_schema(self):
+        """Return pyarrow schema of the records."""
+        pyarrow = _require('pyarrow')
+        return pyarrow.schema([(field, getattr(pyarrow, self.column_types[field][1])()) for field in self.fields])
+
+    def arrow_batches(self, records):
+        """Yield pyarrow record batches of batch_size records."""
+        pyarrow = _require('pyarrow')
+        schema = self.arrow_schema()
+        for columns in self.batches(records):
+            arrays = list()
+            for field, arrow_field in zip(self.fields, schema):
+                values = columns[field]
+                if self.column_types[field][0] == 'O':
+                    values = [None if value is None else json.dumps(value) for value in values]
+                arrays.append(pyarrow.array(values, type=arrow_field.type))
+            yield pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def to_parquet(self, records, file_path: str, **writer_kwargs) -> int:
+        """Write records to file_path Parquet file batch by batch, return number of records."""
+        parquet = _require('pyarrow.parquet')
+        count = 0
+        with parquet.ParquetWriter(file_path, self.arrow_schema(), **writer_kwargs) as writer:
+            for batch in self.arrow_batches(records):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        return count
@@ -1,10 +1,21 @@
 # -*- coding: utf-8 -*-
-"""stdout Logging template."""
+"""stdout Logging template.
 
+logging.handlers and multiprocessing are imported on first use (worker processes aggregation).
+"""
+
+import itertools
 import logging
 import sys
+import threading
+import time
+import weakref
 
 from .descriptors import StringType
+from .tracing import current_span, trace_record_filter
+
+# queue of the aggregating process, set in worker processes by Logging.init_worker
+_worker_queue = None
 
 
 class Logging:
@@ -14,6 +25,8 @@ class Logging:
     log_fmt: log format (only str)
     log_lvl: log level (logging.DEBUG, logging.INFO and etc.)
     file_handler is missing intentionally. Use OS features.
+    Messages can be %-formatted with args (formatting is deferred to the handlers).
+    Records have trace_id and span_id attributes of the active tracing span.
     """
 
     log_date_fmt = StringType('log_date_fmt')
@@ -30,14 +43,20 @@ class Logging:
         log_fmt: log format (only str)
         log_lvl: log level (logging.DEBUG, logging.INFO and etc.)
         """
+        self.__ring = None
+        self.__ring_seq = None
+        self.__ring_file = None
+        self.__hooks = None
+        self.__aggregation = None
         self.root_logger = logging.getLogger(__name__)
         self.log_lvl = log_lvl
         self.root_logger.setLevel(self.log_lvl)
         self.root_logger.propagate = 0
+        self.root_logger.addFilter(trace_record_filter)
         self.log_fmt = log_fmt
         self.log_date_fmt = log_date_fmt
-        formatter = logging.Formatter(fmt=self.log_fmt, datefmt=self.log_date_fmt)
-        self.add_stdout_handler(formatter)
+        self.formatter = logging.Formatter(fmt=self.log_fmt, datefmt=self.log_date_fmt)
+        self.add_stdout_handler(self.formatter)
         self.debug('Log configuration applied.')
 
     @property
@@ -59,34 +78,207 @@ class Logging:
         level = _logging_levels.get(level.upper(), logging.ERROR)
         self.__log_lvl = logging.getLevelName(level)
 
+    def set_level(self, log_lvl: str):
+        """Change root_logger level (logging.DEBUG, logging.INFO and etc.)."""
+        self.log_lvl = log_lvl
+        self.root_logger.setLevel(self.log_lvl)
+
     def add_stdout_handler(self, formatter):
-        """Add stdout handler for root_logger."""
+        """Add stdout handler for root_logger (queue handler in aggregated worker processes)."""
+        if _worker_queue is not None:
+            self.init_worker(_worker_queue, self.log_lvl)
+            return
         handler = logging.StreamHandler(stream=sys.stdout)
         handler.setFormatter(formatter)
         self.root_logger.addHandler(handler)
 
-    def debug(self, message: str):
-        """Write debug message to root_logger."""
-        self.root_logger.debug(message)
+    @property
+    def aggregation_queue(self):
+        """Queue of worker processes records (None if aggregation is not started)."""
+        return self.__aggregation[0] if self.__aggregation is not None else None
+
+    @staticmethod
+    def init_worker(log_queue, log_lvl: str = 'DEBUG'):
+        """Send worker process records to log_queue (process pool initializer).
+
+        Logging instances created in the worker use log_queue too.
+        """
+        from logging.handlers import QueueHandler
+        global _worker_queue
+        _worker_queue = log_queue
+        logger = logging.getLogger(__name__)
+        for handler in logger.handlers.copy():
+            logger.removeHandler(handler)
+        logger.addHandler(QueueHandler(log_queue))
+        logger.setLevel(log_lvl)
+        logger.propagate = 0
+
+    def start_aggregation(self, batch_size: int = 1000):
+        """Start writer thread of worker processes records, return multiprocessing queue for Logging.init_worker.
+
+        Records are written by root_logger handlers, so lines of different processes are not mixed.
+        Records available in the queue are written to stream handlers by one write call (up to batch_size).
+        Per-process fields are %(process)d and %(processName)s of log_fmt.
+        """
+        if self.__aggregation is not None:
+            return self.__aggregation[0]
+        import multiprocessing
+        log_queue = multiprocessing.Queue()
+        thread = threading.Thread(target=self.__write_records, args=(log_queue, batch_size),
+                                  name='dav_utils_log_writer', daemon=True)
+        thread.start()
+        self.__aggregation = (log_queue, thread)
+        return log_queue
+
+    def stop_aggregation(self):
+        """Write the remaining worker processes records and stop writer thread."""
+        if self.__aggregation is None:
+            return
+        log_queue, thread = self.__aggregation
+        log_queue.put(None)
+        thread.join()
+        log_queue.close()
+        log_queue.join_thread()
+        self.__aggregation = None
+
+    def __write_records(self, log_queue, batch_size: int):
+        """Write batches of queued records until None is received."""
+        import queue
+        while True:
+            records = [log_queue.get()]
+            try:
+                while records[-1] is not None and len(records) < batch_size:
+                    records.append(log_queue.get_nowait())
+            except queue.Empty:
+                pass
+            stop = records[-1] is None
+            if stop:
+                records.pop()
+            self.__write_batch(records)
+            if stop:
+                return
+
+    def __write_batch(self, records: list):
+        """Write records with root_logger handlers (one write per stream handler)."""
+        for handler in self.root_logger.handlers:
+            accepted = [record for record in records if record.levelno >= handler.level and handler.filter(record)]
+            if not accepted:
+                continue
+            if isinstance(handler, logging.StreamHandler) and handler.stream is not None:
+                text = ''.join(handler.format(record) + handler.terminator for record in accepted)
+                handler.acquire()
+                try:
+                    handler.stream.write(text)
+                    handler.flush()
+                finally:
+                    handler.release()
+            else:
+                for record in accepted:
+                    handler.handle(record)
+
+    def capture_debug(self, size: int = 1000, dump_file: str = None):
+        """Keep the last size DEBUG messages suppressed by log_lvl in a ring buffer.
+
+        Only message, args and the active tracing span are stored, records are formatted on dump.
+        Buffer is dumped on error, critical and unhandled exception (sys.excepthook
+        and threading.excepthook) to dump_file or root_logger handlers.
+        Hooks refer to the instance weakly and are removed when it is deleted.
+        """
+        self.stop_capture()
+        self.__ring_file = dump_file
+        self.__ring_seq = itertools.count()
+        self.__ring = [None] * size
+        previous_hook = sys.excepthook
+        previous_threading_hook = getattr(threading, 'excepthook', None)
+        instance = weakref.ref(self)
+
+        def excepthook(*exc_info):
+            logger = instance()
+            if logger is not None:
+                logger.dump_debug()
+            previous_hook(*exc_info)
+
+        def threading_excepthook(hook_args):
+            logger = instance()
+            if logger is not None:
+                logger.dump_debug()
+            previous_threading_hook(hook_args)
+
+        self.__hooks = ((sys, 'excepthook', previous_hook, excepthook),
+                        (threading, 'excepthook', previous_threading_hook, threading_excepthook))
+        for module, name, previous, hook in self.__hooks:
+            if previous is not None:
+                setattr(module, name, hook)
+
+    def stop_capture(self):
+        """Stop DEBUG messages capture and restore exception hooks (if they were not replaced)."""
+        if self.__ring is None:
+            return
+        for module, name, previous, hook in self.__hooks:
+            if previous is not None and getattr(module, name) is hook:
+                setattr(module, name, previous)
+        self.__ring = None
+        self.__hooks = None
+
+    def dump_debug(self) -> int:
+        """Write captured DEBUG messages to dump_file or root_logger handlers and clear the buffer.
+
+        Return number of written messages.
+        """
+        if self.__ring is None:
+            return 0
+        entries = sorted(entry for entry in self.__ring if entry is not None)
+        self.__ring[:] = [None] * len(self.__ring)
+        records = list()
+        for __, created, active_span, message, args in entries:
+            record = self.root_logger.makeRecord(self.root_logger.name, logging.DEBUG, '', 0, message, args, None)
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+            # span of the debug call, logger filters are not applied to captured records
+            record.trace_id = active_span.trace_id if active_span is not None else ''
+            record.span_id = active_span.span_id if active_span is not None else ''
+            records.append(record)
+
+        if self.__ring_file:
+            with open(self.__ring_file, 'a', encoding='utf-8') as dump_file:
+                dump_file.writelines(self.formatter.format(record) + '\n' for record in records)
+        else:
+            for record in records:
+                self.root_logger.callHandlers(record)
+        return len(records)
+
+    def debug(self, message: str, *args):
+        """Write debug message to root_logger (or to the capture buffer if DEBUG is suppressed)."""
+        ring = self.__ring
+        if ring is not None and not self.root_logger.isEnabledFor(logging.DEBUG):
+            seq = next(self.__ring_seq)
+            ring[seq % len(ring)] = (seq, time.time(), current_span(), message, args)
+            return
+        self.root_logger.debug(message, *args)
 
-    def info(self, message: str):
+    def info(self, message: str, *args):
         """Write info message to root_logger."""
-        self.root_logger.info(message)
+        self.root_logger.info(message, *args)
 
-    def warning(self, message: str):
+    def warning(self, message: str, *args):
         """Write warning message to root_logger."""
-        self.root_logger.warning(message)
+        self.root_logger.warning(message, *args)
 
-    def error(self, message: str):
-        """Write error message to root_logger."""
-        self.root_logger.error(message)
+    def error(self, message: str, *args):
+        """Write error message to root_logger (captured DEBUG messages are dumped first)."""
+        self.dump_debug()
+        self.root_logger.error(message, *args)
 
-    def critical(self, message: str):
-        """Write critical message to root_logger."""
-        self.root_logger.critical(message)
+    def critical(self, message: str, *args):
+        """Write critical message to root_logger (captured DEBUG messages are dumped first)."""
+        self.dump_debug()
+        self.root_logger.critical(message, *args)
 
     def __del__(self):
-        """Want to delete all handlers created by Logger."""
+        """Want to delete all handlers created by Logger (worker process queue handler is kept)."""
+        self.stop_capture()
+        if _worker_queue is not None:
+            return
         self.root_logger.debug('Remove existing handlers.')
         for handler in self.root_logger.handlers.copy():
             handler.close()
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Process resource usage metrics.
+
+Metrics are read from stdlib resource, /proc/self and gc.callbacks,
+so no external agents are required (/proc metrics are Linux only).
+"""
+
+import gc
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# metric name: (prometheus type, help)
+METRICS = {
+    'cpu_user_seconds_total': ('counter', 'User CPU time spent by the process.'),
+    'cpu_system_seconds_total': ('counter', 'System CPU time spent by the process.'),
+    'max_rss_bytes': ('gauge', 'Peak resident set size.'),
+    'rss_bytes': ('gauge', 'Current resident set size.'),
+    'open_fds': ('gauge', 'Number of open file descriptors.'),
+    'threads': ('gauge', 'Number of alive python threads.'),
+    'io_read_bytes_total': ('counter', 'Bytes read by the process (including page cache).'),
+    'io_write_bytes_total': ('counter', 'Bytes written by the process (including page cache).'),
+    'gc_collections_total': ('counter', 'Number of garbage collections.'),
+    'gc_collected_objects_total': ('counter', 'Number of objects collected by the garbage collector.'),
+    'gc_pause_seconds_total': ('counter', 'Time spent in garbage collections.'),
+}
+
+
+class MetricsSampler:
+    """Background sampler of the process resource usage.
+
+    interval: seconds between samples
+    log: Logging instance for 'metrics: key=value ...' info messages
+    json_file: file for JSON lines of samples
+    prometheus_file: file in Prometheus text format (for node-exporter textfile collector)
+    prefix: Prometheus metric names prefix
+    """
+
+    def __init__(self, interval: float = 60.0, log=None, json_file: str = None, prometheus_file: str = None,
+                 prefix: str = 'dav_utils_process'):
+        """Set sampling parameters."""
+        self.interval = interval
+        self.log = log
+        self.json_file = json_file
+        self.prometheus_file = prometheus_file
+        self.prefix = prefix
+        self.__gc_pause = 0.0
+        self.__gc_started = None
+        self.__stop = None
+        self.__thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Create sampler from Config keys.
+
+        metrics_interval: seconds between samples (default 60)
+        metrics_log: emit samples via config.log (default True)
+        metrics_json_file: file for JSON lines of samples
+        metrics_prometheus_file: file in Prometheus text format
+        """
+        return cls(interval=getattr(config, 'metrics_interval', 60.0),
+                   log=config.log if getattr(config, 'metrics_log', True) else None,
+                   json_file=getattr(config, 'metrics_json_file', None),
+                   prometheus_file=getattr(config, 'metrics_prometheus_file', None))
+
+    def __gc_callback(self, phase: str, info: dict):
+        """Measure garbage collections duration."""
+        if phase == 'start':
+            self.__gc_started = time.perf_counter()
+        elif self.__gc_started is not None:
+            self.__gc_pause += time.perf_counter() - self.__gc_started
+            self.__gc_started = None
+
+    @staticmethod
+    def __read_proc(file_name: str):
+        """Return /proc/self/file_name content or None if it is not available."""
+        try:
+            with open(os.path.join('/proc/self', file_name)) as proc_file:
+                return proc_file.read()
+        except OSError:
+            return None
+
+    def sample(self) -> dict:
+        """Return current metrics values (unavailable metrics are skipped)."""
+        metrics = {'threads': threading.active_count()}
+
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            metrics['cpu_user_seconds_total'] = usage.ru_utime
+            metrics['cpu_system_seconds_total'] = usage.ru_stime
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+            metrics['max_rss_bytes'] = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        else:  # pragma: no cover
+            times = os.times()
+            metrics['cpu_user_seconds_total'] = times.user
+            metrics['cpu_system_seconds_total'] = times.system
+
+        statm = self.__read_proc('statm')
+        if statm:
+            metrics['rss_bytes'] = int(statm.split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+        io_stat = self.__read_proc('io')
+        if io_stat:
+            io_values = dict(line.split(': ') for line in io_stat.splitlines() if ': ' in line)
+            metrics['io_read_bytes_total'] = int(io_values.get('rchar', 0))
+            metrics['io_write_bytes_total'] = int(io_values.get('wchar', 0))
+
+        for fd_dir in ('/proc/self/fd', '/dev/fd'):
+            try:
+                metrics['open_fds'] = len(os.listdir(fd_dir))
+            except OSError:
+                continue
+            break
+
+        stats = gc.get_stats()
+        metrics['gc_collections_total'] = sum(stat['collections'] for stat in stats)
+        metrics['gc_collected_objects_total'] = sum(stat['collected'] for stat in stats)
+        if self.__thread is not None:
+            # pause time is measured only while sampling is started
+            metrics['gc_pause_seconds_total'] = self.__gc_pause
+        return metrics
+
+    def prometheus_text(self, metrics: dict) -> str:
+        """Return metrics in Prometheus text exposition format."""
+        lines = list()
+        for name, value in sorted(metrics.items()):
+            metric_type, metric_help = METRICS[name]
+            full_name = '{prefix}_{name}'.format(prefix=self.prefix, name=name)
+            lines.append('# HELP {name} {help}'.format(name=full_name, help=metric_help))
+            lines.append('# TYPE {name} {type}'.format(name=full_name, type=metric_type))
+            lines.append('{name} {value}'.format(name=full_name, value=value))
+        return '\n'.join(lines) + '\n'
+
+    def emit(self, metrics: dict = None) -> dict:
+        """Take a sample (if metrics is not set) and write it to log, json_file and prometheus_file."""
+        metrics = metrics or self.sample()
+        if self.log is not None:
+            self.log.info('metrics: ' + ' '.join('{key}={value}'.format(key=key, value=value)
+                                                 for key, value in sorted(metrics.items())))
+        if self.json_file:
+            with open(self.json_file, 'a', encoding='utf-8') as json_file:
+                json_file.write(json.dumps(dict(metrics, timestamp=time.time()), sort_keys=True) + '\n')
+        if self.prometheus_file:
+            # textfile collector may read the file at any moment, so replace it atomically
+            temp_file = self.prometheus_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as prometheus_file:
+                prometheus_file.write(self.prometheus_text(metrics))
+            os.replace(temp_file, self.prometheus_file)
+        return metrics
+
+    def start(self):
+        """Start background sampling thread."""
+        if self.__thread is not None:
+            return
+        gc.callbacks.append(self.__gc_callback)
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, args=(self.__stop,),
+                                         name='dav_utils_metrics', daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Stop background sampling thread and emit the last sample."""
+        if self.__thread is None:
+            return
+        self.__stop.set()
+        self.__thread.join()
+        self.emit()
+        gc.callbacks.remove(self.__gc_callback)
+        self.__thread = None
+
+    def __run(self, stop: threading.Event):
+        """Emit samples every interval seconds until stop is set."""
+        while not stop.wait(self.interval):
+            try:
+                self.emit()
+            except OSError as err:
+                if self.log is not None:
+                    self.log.error('Metrics can not be written: {err}'.format(err=err))
+
+    def __enter__(self):
+        """Start sampling."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Stop sampling."""
+        self.stop()
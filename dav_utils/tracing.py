@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Lightweight tracing of script stages.
+
+Current span is stored in contextvars, so nested spans are tracked per thread
+and per asyncio task. Completed spans are exported as Chrome trace events
+(chrome://tracing, https://ui.perfetto.dev).
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+
+_current_span = contextvars.ContextVar('dav_utils_span', default=None)
+_exporter = None
+_atexit_registered = False
+
+
+def current_span():
+    """Return active Span or None."""
+    return _current_span.get()
+
+
+def trace_record_filter(record) -> bool:
+    """Set trace_id and span_id attributes of logging record (empty strings outside of spans)."""
+    active = _current_span.get()
+    record.trace_id = active.trace_id if active is not None else ''
+    record.span_id = active.span_id if active is not None else ''
+    return True
+
+
+class Span:
+    """Timed stage of a trace (context manager and decorator).
+
+    name: span name
+    log: Logging instance for 'span name: duration' debug messages
+    args: extra values of the exported trace event
+    Span started inside another span shares its trace_id.
+    """
+
+    def __init__(self, name: str, log=None, **args):
+        """Set span name."""
+        self.name = name
+        self.log = log
+        self.args = args
+        self.trace_id = None
+        self.span_id = None
+        self.parent_id = None
+        self.start_time = None
+        self.duration = None
+        self.__started = None
+        self.__token = None
+
+    def __enter__(self):
+        """Start span as a child of the active span."""
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = os.urandom(8).hex()
+        self.start_time = time.time()
+        self.__token = _current_span.set(self)
+        self.__started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Finish span and export it."""
+        self.duration = time.perf_counter() - self.__started
+        _current_span.reset(self.__token)
+        if exc_type is not None:
+            self.args['error'] = repr(exc_val)
+        if self.log is not None:
+            self.log.debug('span %s: %.6fs', self.name, self.duration)
+        exporter = _exporter
+        if exporter is not None:
+            exporter.add(self)
+
+    def __call__(self, func):
+        """Decorate func (coroutine function too) to run each call in a new span."""
+        import inspect
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with Span(self.name, self.log, **self.args):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(self.name, self.log, **self.args):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def trace_event(self) -> dict:
+        """Return completed span as Chrome trace event (complete event, microseconds)."""
+        args = dict(self.args, trace_id=self.trace_id, span_id=self.span_id)
+        if self.parent_id is not None:
+            args['parent_id'] = self.parent_id
+        return {
+            'name': self.name,
+            'ph': 'X',
+            'ts': int(self.start_time * 1000000),
+            'dur': int(self.duration * 1000000),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+
+
+def span(name: str, log=None, **args) -> Span:
+    """Return Span context manager / decorator (see Span)."""
+    return Span(name, log, **args)
+
+
+class TraceExporter:
+    """Append completed spans to file_path as Chrome trace events.
+
+    File is a JSON array without the closing bracket (one event per line),
+    that is accepted by chrome://tracing and Perfetto.
+    Events are written by buffer_size.
+    """
+
+    def __init__(self, file_path: str, buffer_size: int = 1000):
+        """Create file with the opening bracket."""
+        self.file_path = file_path
+        self.buffer_size = buffer_size
+        self.__events = list()
+        self.__lock = threading.Lock()
+        with open(self.file_path, 'w', encoding='utf-8') as trace_file:
+            trace_file.write('[\n')
+
+    def add(self, completed_span: Span):
+        """Buffer completed span event."""
+        event = completed_span.trace_event()
+        with self.__lock:
+            self.__events.append(event)
+            if len(self.__events) < self.buffer_size:
+                return
+            events, self.__events = self.__events, list()
+            self.__write(events)
+
+    def flush(self):
+        """Write buffered events."""
+        with self.__lock:
+            events, self.__events = self.__events, list()
+            self.__write(events)
+
+    def __write(self, events: list):
+        """Append events to the file."""
+        if not events:
+            return
+        with open(self.file_path, 'a', encoding='utf-8') as trace_file:
+            trace_file.write(''.join(json.dumps(event, default=str) + ',\n' for event in events))
+
+
+def start_export(file_path: str, buffer_size: int = 1000) -> TraceExporter:
+    """Export completed spans of the process to file_path (buffered spans are written on exit)."""
+    global _exporter, _atexit_registered
+    stop_export()
+    if not _atexit_registered:
+        atexit.register(stop_export)
+        _atexit_registered = True
+    _exporter = TraceExporter(file_path, buffer_size)
+    return _exporter
+
+
+def stop_export():
+    """Write buffered spans and stop export."""
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.flush()
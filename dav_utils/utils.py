@@ -1,23 +1,469 @@
 # -*- coding: utf-8 -*-
 """Some utils for pure python scripts."""
 
+import collections
+import contextvars
+import csv
 import datetime
+import functools
 import io
+import itertools
 import json
 import os
-from abc import ABC
+import threading
+import time
+import weakref
+from abc import ABC, ABCMeta
 from types import GeneratorType
 
+from .descriptors import EnumStringType, TypeChecker
 
-class Util(ABC):
+# Blocking I/O of async helpers is offloaded to this bounded pool.
+IO_WORKERS = 4
+# Size hint (in bytes) of one blocking read made by async_read_file_gen.
+IO_CHUNK_SIZE = 64 * 1024
+
+# Max size of the memo of already parsed strings (per date format).
+DATE_CACHE_SIZE = 4096
+# Directives that can be parsed/formatted by fixed-width slicing.
+_FIXED_WIDTH_DIRECTIVES = {'%Y': ('year', 4), '%m': ('month', 2), '%d': ('day', 2)}
+
+_io_executor = None
+_class_attrs_cache = weakref.WeakKeyDictionary()
+_io_executor_lock = threading.Lock()
+
+
+def io_executor():
+    """Return shared ThreadPoolExecutor for async file helpers (created on first call)."""
+    global _io_executor
+    if _io_executor is None:
+        with _io_executor_lock:
+            if _io_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='dav_utils_io')
+    return _io_executor
+
+
+def _strptime_parser(date_fmt: str):
+    """Return generic datetime.strptime based parser for date_fmt."""
+    strptime = datetime.datetime.strptime
+
+    def parse(date_str):
+        return strptime(date_str, date_fmt).date()
+    return parse
+
+
+def _fixed_width_layout(date_fmt: str):
+    """Return (fields, literals, length) of date_fmt or None if it is not fixed-width.
+
+    Fixed-width format consists of %Y, %m, %d (each exactly once) and literal characters.
+    fields: directive -> slice of the date string
+    literals: list of (position, character)
+    """
+    fields = dict()
+    literals = list()
+    pos = 0
+    idx = 0
+    while idx < len(date_fmt):
+        directive = date_fmt[idx:idx + 2]
+        if date_fmt[idx] == '%':
+            if directive not in _FIXED_WIDTH_DIRECTIVES or directive in fields:
+                return None
+            width = _FIXED_WIDTH_DIRECTIVES[directive][1]
+            fields[directive] = slice(pos, pos + width)
+            pos += width
+            idx += 2
+        else:
+            literals.append((pos, date_fmt[idx]))
+            pos += 1
+            idx += 1
+    if len(fields) != len(_FIXED_WIDTH_DIRECTIVES):
+        return None
+    return fields, literals, pos
+
+
+def _compile_date_parser(date_fmt: str):
+    """Build str to date function specialized for date_fmt.
+
+    Fixed-width formats are parsed by slicing. Strings that do not fit the layout
+    exactly are passed to datetime.strptime, so the result (or the error) is the same
+    as strptime gives.
+    """
+    fallback = _strptime_parser(date_fmt)
+    layout = _fixed_width_layout(date_fmt)
+    if layout is None:
+        return fallback
+
+    fields, literals, length = layout
+    year, month, day = fields['%Y'], fields['%m'], fields['%d']
+    date = datetime.date
+    if date_fmt == '%Y-%m-%d':
+        def parse(date_str):
+            if len(date_str) == length and date_str[4] == '-' and date_str[7] == '-' \
+                    and (date_str[:4] + date_str[5:7] + date_str[8:]).isdigit() and date_str.isascii():
+                return date.fromisoformat(date_str)
+            return fallback(date_str)
+        return parse
+
+    def parse(date_str):
+        if len(date_str) == length and all(date_str[lit_pos] == lit for lit_pos, lit in literals):
+            year_str, month_str, day_str = date_str[year], date_str[month], date_str[day]
+            if (year_str + month_str + day_str).isdigit() and date_str.isascii():
+                return date(int(year_str), int(month_str), int(day_str))
+        return fallback(date_str)
+    return parse
+
+
+def _compile_date_formatter(date_fmt: str):
+    """Build date to str function specialized for date_fmt.
+
+    Formats that consist of %Y, %m, %d and literal characters are rendered by
+    str.format template; everything else is passed to datetime.strftime.
+    """
+    strftime = datetime.datetime.strftime
+
+    def fallback(date):
+        return strftime(date, date_fmt)
+
+    template = list()
+    idx = 0
+    while idx < len(date_fmt):
+        directive = date_fmt[idx:idx + 2]
+        if date_fmt[idx] == '%':
+            if directive not in _FIXED_WIDTH_DIRECTIVES:
+                return fallback
+            attr, width = _FIXED_WIDTH_DIRECTIVES[directive]
+            template.append('{0.%s:0%dd}' % (attr, width))
+            idx += 2
+        else:
+            template.append(date_fmt[idx].replace('{', '{{').replace('}', '}}'))
+            idx += 1
+    template = ''.join(template).format
+    date_type = datetime.date
+
+    def render(date):
+        # strftime does not zero-pad years < 1000, keep its behaviour
+        if isinstance(date, date_type) and date.year >= 1000:
+            return template(date)
+        return fallback(date)
+    return render
+
+
+def _require_numpy():
+    """Import numpy on first use (raise ImportError if it is not installed)."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('numpy is required for datetime64 conversion.')
+    return numpy
+
+
+def _str_to_datetime64(date_strs, date_fmt: str):
+    """Vectorized str to datetime64[D] conversion for fixed-width date_fmt.
+
+    Strings are viewed as a (rows, chars) matrix of code points, so the layout
+    check and the digits to numbers conversion are numpy operations on columns.
+    """
+    numpy = _require_numpy()
+    fields, literals, length = _fixed_width_layout(date_fmt)
+    # One extra char to catch the values that are longer than the format
+    width = length + 1
+    values = numpy.ascontiguousarray(date_strs, dtype='U{}'.format(width)).reshape(-1)
+    codes = values.view(numpy.uint32).reshape(len(values), width)
+
+    valid = codes[:, length] == 0
+    for pos, lit in literals:
+        valid &= codes[:, pos] == ord(lit)
+
+    numbers = dict()
+    for directive, field in fields.items():
+        digits = codes[:, field].astype(numpy.int64) - ord('0')
+        valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        powers = 10 ** numpy.arange(digits.shape[1] - 1, -1, -1)
+        numbers[directive] = digits.dot(powers)
+
+    year, month, day = numbers['%Y'], numbers['%m'], numbers['%d']
+    valid &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+    year = numpy.where(valid, year, 1970)
+    month = numpy.where(valid, month, 1)
+    day = numpy.where(valid, day, 1)
+
+    months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    dates = months.astype('datetime64[D]') + (day - 1).astype('timedelta64[D]')
+    valid &= dates < (months + 1).astype('datetime64[D]')
+    dates[~valid] = numpy.datetime64('NaT')
+    return dates, numpy.flatnonzero(~valid)
+
+
+def _datetime64_to_str(dates, date_fmt: str):
+    """Vectorized datetime64[D] to str conversion for fixed-width date_fmt.
+
+    Code points of ISO-8601 representation are rearranged to date_fmt layout.
+    """
+    numpy = _require_numpy()
+    fields, literals, length = _fixed_width_layout(date_fmt)
+    years = dates.astype('datetime64[Y]').astype(numpy.int64) + 1970
+    valid = ~numpy.isnat(dates) & (years >= 1) & (years <= 9999)
+    iso = numpy.datetime_as_string(numpy.where(valid, dates, numpy.datetime64(0, 'D')), unit='D')
+    iso_codes = numpy.ascontiguousarray(iso, dtype='U10').view(numpy.uint32).reshape(len(iso), 10)
+
+    iso_fields = {'%Y': slice(0, 4), '%m': slice(5, 7), '%d': slice(8, 10)}
+    codes = numpy.empty((len(iso), length), dtype=numpy.uint32)
+    for directive, field in fields.items():
+        codes[:, field] = iso_codes[:, iso_fields[directive]]
+    for pos, lit in literals:
+        codes[:, pos] = ord(lit)
+
+    result = codes.view('U{}'.format(length)).reshape(-1)
+    result[~valid] = ''
+    return result, numpy.flatnonzero(~valid)
+
+
+_TRUE_STRINGS = frozenset(['1', 'true', 'yes', 'y', 'on'])
+_FALSE_STRINGS = frozenset(['0', 'false', 'no', 'n', 'off'])
+
+
+def _parse_bool(value: str) -> bool:
+    """Convert CSV cell to bool."""
+    lowered = value.lower()
+    if lowered in _TRUE_STRINGS:
+        return True
+    if lowered in _FALSE_STRINGS:
+        return False
+    raise ValueError('{val} is not a bool string.'.format(val=value))
+
+
+# descriptor value_type: CSV cell parser
+_CSV_PARSERS = {int: int, float: float, bool: _parse_bool, list: json.loads, dict: json.loads}
+
+
+# parsers that always return value_type (type check of the parsed value is skipped)
+_CSV_TYPED_PARSERS = frozenset([int, float, bool])
+
+
+def _csv_enum_converter(spec):
+    """Compile EnumStringType column to a converter of cells to the values stored by the descriptor."""
+    nullable = spec.nullable
+    value_of = spec.value_of
+
+    def convert_enum(value):
+        if nullable and value == '':
+            return None
+        try:
+            return value_of(value)
+        except TypeError as err:
+            raise ValueError(str(err))
+    return convert_enum
+
+
+def _csv_checker_converter(spec):
+    """Compile TypeChecker column to a converter that parses and checks cells."""
+    value_type = spec.value_type
+    parse = _CSV_PARSERS.get(value_type)
+    if parse is None and value_type is not str:
+        raise TypeError('{val_type} column can not be parsed, pass a converter function.'.format(val_type=value_type))
+    if type(spec).__set__ is not TypeChecker.__set__:
+        check = spec.compile_check()
+    elif value_type in _CSV_TYPED_PARSERS or value_type is str:
+        check = None
+    else:
+        check = spec._compile_type_check()
+    if check is None and not spec.nullable:
+        return parse or str
+    nullable = spec.nullable
+
+    def convert(value):
+        if nullable and value == '':
+            return None
+        if parse is not None:
+            value = parse(value)
+        if check is not None:
+            error = check(value)
+            if error is not None:
+                raise ValueError(error)
+        return value
+    return convert
+
+
+def _csv_converter(spec):
+    """Compile CSV column spec to a cell converter function.
+
+    spec: TypeChecker subclass or instance (IntType, UuidStringType and etc.),
+        date format str (converted by Util.date_parser) or any callable
+    Empty cell of a nullable descriptor column is converted to None.
+    EnumStringType cells are converted to the value stored by the descriptor (interned).
+    Parsed cells are checked by the compiled descriptor check, unless the parser
+    always returns value_type (int, float, bool). TypeChecker columns of types
+    without a parser (other than str) raise TypeError.
+    """
+    if isinstance(spec, str):
+        return Util.date_parser(spec)
+    if isinstance(spec, type) and issubclass(spec, TypeChecker):
+        spec = spec('column')
+    if not isinstance(spec, TypeChecker):
+        return spec
+    if isinstance(spec, EnumStringType):
+        return _csv_enum_converter(spec)
+    return _csv_checker_converter(spec)
+
+
+def _csv_formatter(spec):
+    """Compile CSV column spec to a cell formatter function (None - cell is written as is).
+
+    Dates are formatted by Util.date_formatter, list and dict descriptor columns - as JSON.
+    """
+    if isinstance(spec, type) and issubclass(spec, TypeChecker):
+        spec = spec('column')
+    if isinstance(spec, str):
+        formatter = Util.date_formatter(spec)
+    elif isinstance(spec, TypeChecker) and spec.value_type in (list, dict):
+        formatter = json.dumps
+    else:
+        return None
+
+    def format_cell(value):
+        return None if value is None else formatter(value)
+    return format_cell
+
+
+class ParallelMapError(Exception):
+    """Exception raised by parallel_map func.
+
+    index: position of the item in the input iterable
+    item: the failed item
+    Original exception is available as __cause__.
+    """
+
+    def __init__(self, index: int, item, error: Exception):
+        """Keep failed item context (all arguments are passed to Exception, so it can be pickled)."""
+        super().__init__(index, item, error)
+        self.index = index
+        self.item = item
+        self.error = error
+
+    def __str__(self):
+        """Return failed item description."""
+        return 'item #{idx} ({item!r}) failed: {err!r}'.format(idx=self.index, item=self.item, err=self.error)
+
+
+def _map_batch(func, items: list):
+    """Apply func to items (in a worker).
+
+    Return (results, None, None) or (None, failed item offset, exception).
+    """
+    results = list()
+    for offset, item in enumerate(items):
+        try:
+            results.append(func(item))
+        except Exception as err:
+            return None, offset, err
+    return results, None, None
+
+
+class _Throughput:
+    """parallel_map progress logger."""
+
+    __slots__ = ('log', 'log_every', 'done', 'started', 'next_log')
+
+    def __init__(self, log, log_every: int):
+        """Start counting."""
+        self.log = log
+        self.log_every = log_every
+        self.done = 0
+        self.started = time.monotonic()
+        self.next_log = log_every
+
+    def message(self) -> str:
+        """Return progress message."""
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        return 'parallel_map: {done} items in {elapsed:.1f}s ({rate:.1f} items/s)'.format(
+            done=self.done, elapsed=elapsed, rate=rate)
+
+    def add(self, count: int):
+        """Count processed items and log progress every log_every items."""
+        self.done += count
+        if self.log is not None and self.done >= self.next_log:
+            self.next_log = self.done + self.log_every
+            self.log.debug(self.message())
+
+    def finish(self):
+        """Log total throughput."""
+        if self.log is not None:
+            self.log.info(self.message())
+
+
+class _ClassAttrs:
+    """Classification of class attributes used by Util.update and Util.public_attrs.
+
+    methods: names of callable class attributes (metaclass attributes included)
+    skipped: public names that are never returned by public_attrs (methods and properties)
+    class_values: public class data attributes and their values
+    instance_names: public class attributes that should be read from an instance
+        (ex: TypeChecker descriptors that can not be accessed from a class)
+    mixins: (class, copy of its __dict__) of base classes that are not Util subclasses
+        (their mutation is not seen by _UtilMeta, so they are compared on each lookup)
+    """
+
+    __slots__ = ('methods', 'skipped', 'class_values', 'instance_names', 'mixins')
+
+    def __init__(self, class_):
+        """Walk class (and metaclass) attributes once."""
+        self.mixins = tuple((base, dict(vars(base))) for base in class_.__mro__
+                            if not isinstance(base, _UtilMeta) and base not in (object, ABC))
+        methods = set()
+        skipped = set()
+        self.class_values = dict()
+        self.instance_names = list()
+        class_names = set(dir(class_))
+        for name in sorted(class_names | set(dir(type(class_)))):
+            try:
+                value = getattr(class_, name)
+            except AttributeError:
+                if not name.startswith('_') and name in class_names:
+                    self.instance_names.append(name)
+                continue
+            if callable(value):
+                methods.add(name)
+                skipped.add(name)
+            elif isinstance(value, property):
+                skipped.add(name)
+            elif not name.startswith('_') and name in class_names:
+                self.class_values[name] = value
+        self.methods = frozenset(methods)
+        self.skipped = frozenset(skipped)
+
+
+def _class_attrs(class_) -> _ClassAttrs:
+    """Return cached classification of class_ attributes (computed again if a mixin is changed)."""
+    class_attrs = _class_attrs_cache.get(class_)
+    if class_attrs is None or any(vars(base) != attrs for base, attrs in class_attrs.mixins):
+        class_attrs = _class_attrs_cache[class_] = _ClassAttrs(class_)
+    return class_attrs
+
+
+class _UtilMeta(ABCMeta):
+    """Util metaclass that drops cached attributes classification on class mutation."""
+
+    def __setattr__(cls, name, value):
+        """Set class attribute and invalidate cached classification."""
+        super().__setattr__(name, value)
+        _class_attrs_cache.clear()
+
+    def __delattr__(cls, name):
+        """Delete class attribute and invalidate cached classification."""
+        super().__delattr__(name)
+        _class_attrs_cache.clear()
+
+
+class Util(ABC, metaclass=_UtilMeta):
     """Some useful utils methods."""
 
     def update(self, attrs_dict: dict):
         """Update class public attrs."""
+        methods = _class_attrs(self.__class__).methods
         for attr in attrs_dict:
-            if attr.startswith('_'):
-                continue
-            if hasattr(self.__class__, attr) and callable(getattr(self.__class__, attr)):  # noqa
+            if attr.startswith('_') or attr in methods:
                 continue
             self.__setattr__(attr.lower(), attrs_dict[attr])
 
@@ -49,11 +495,26 @@ class Util(ABC):
         __, file_ext = os.path.splitext(file_name)
         assert file_ext in extension_list
 
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def date_parser(date_fmt: str):
+        """Return str to date function compiled for date_fmt.
+
+        Already parsed strings are memoized (up to DATE_CACHE_SIZE per format).
+        """
+        return functools.lru_cache(maxsize=DATE_CACHE_SIZE)(_compile_date_parser(date_fmt))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def date_formatter(date_fmt: str):
+        """Return date to str function compiled for date_fmt."""
+        return _compile_date_formatter(date_fmt)
+
     @staticmethod
     def str_to_date(date_str: str, date_fmt: str):
         """Convert str to date."""
         try:
-            converted = datetime.datetime.strptime(date_str, date_fmt).date()
+            converted = Util.date_parser(date_fmt)(date_str)
         except (TypeError, ValueError) as conversion_error:
             raise ValueError(conversion_error)
         return converted
@@ -62,11 +523,86 @@ class Util(ABC):
     def date_to_str(date: datetime.datetime, date_fmt: str):
         """Convert date/datetime to str."""
         try:
-            converted = datetime.datetime.strftime(date, date_fmt)
+            converted = Util.date_formatter(date_fmt)(date)
         except (TypeError, ValueError) as conversion_error:
             raise ValueError(conversion_error)
         return converted
 
+    @staticmethod
+    def str_to_dates(date_strs, date_fmt: str) -> list:
+        """Convert iterable of str to list of dates."""
+        try:
+            converted = list(map(Util.date_parser(date_fmt), date_strs))
+        except (TypeError, ValueError) as conversion_error:
+            raise ValueError(conversion_error)
+        return converted
+
+    @staticmethod
+    def dates_to_str(dates, date_fmt: str) -> list:
+        """Convert iterable of date/datetime to list of str."""
+        try:
+            converted = list(map(Util.date_formatter(date_fmt), dates))
+        except (TypeError, ValueError) as conversion_error:
+            raise ValueError(conversion_error)
+        return converted
+
+    @staticmethod
+    def str_to_datetime64(date_strs, date_fmt: str):
+        """Convert iterable of str to numpy datetime64[D] array (numpy is required).
+
+        Return (dates, invalid) tuple: invalid is an array of indexes of values that
+        can not be converted, dates has NaT at these indexes.
+        Fixed-width formats (%Y, %m, %d and literal characters) are converted by
+        vectorized operations (non-str values are converted to str first), values
+        rejected by them and other formats are converted by date_parser one by one.
+        """
+        numpy = _require_numpy()
+        if not isinstance(date_strs, numpy.ndarray):
+            date_strs = list(date_strs)
+        if _fixed_width_layout(date_fmt) is not None:
+            dates, indexes = _str_to_datetime64(date_strs, date_fmt)
+        else:
+            dates = numpy.empty(len(date_strs), dtype='datetime64[D]')
+            indexes = range(len(date_strs))
+
+        # Values rejected by vectorized check (ex: not zero-padded) are parsed one by one
+        parser = Util.date_parser(date_fmt)
+        invalid = list()
+        for idx in indexes:
+            try:
+                dates[idx] = parser(date_strs[idx])
+            except (TypeError, ValueError):
+                dates[idx] = numpy.datetime64('NaT')
+                invalid.append(idx)
+        return dates, numpy.array(invalid, dtype=numpy.intp)
+
+    @staticmethod
+    def datetime64_to_str(dates, date_fmt: str):
+        """Convert array of datetime64 (or iterable of dates) to numpy str array (numpy is required).
+
+        Return (date_strs, invalid) tuple: invalid is an array of indexes of NaT
+        (or out of 1-9999 years range) values, date_strs has '' at these indexes.
+        Fixed-width formats are converted by vectorized operations (years are always
+        4 digits), other formats are converted by date_formatter one by one.
+        """
+        numpy = _require_numpy()
+        if not isinstance(dates, numpy.ndarray):
+            dates = list(dates)
+        dates = numpy.asarray(dates, dtype='datetime64[D]').reshape(-1)
+        if _fixed_width_layout(date_fmt) is not None:
+            return _datetime64_to_str(dates, date_fmt)
+
+        formatter = Util.date_formatter(date_fmt)
+        date_strs = list()
+        invalid = list()
+        for idx, date in enumerate(dates.astype(object)):
+            try:
+                date_strs.append(formatter(date))
+            except (TypeError, ValueError):
+                date_strs.append('')
+                invalid.append(idx)
+        return numpy.array(date_strs, dtype=str), numpy.array(invalid, dtype=numpy.intp)
+
     @staticmethod
     def read_file_gen(file_name: str):
         """Line by line read the file_name file."""
@@ -91,16 +627,205 @@ class Util(ABC):
         with io.open(file_path, mode="w", encoding="utf-8") as json_file:  # noqa
             json.dump(json_data, json_file, sort_keys=True, indent=2, ensure_ascii=False)  # noqa
 
+    @staticmethod
+    async def async_read_file_gen(file_name: str, chunk_size: int = IO_CHUNK_SIZE):
+        """Asynchronously line by line read the file_name file.
+
+        Lines are read in the io_executor by chunks of about chunk_size bytes,
+        so the event loop is blocked only for yielding already read lines.
+        """
+        assert (isinstance(file_name, str))
+        import asyncio
+        loop = asyncio.get_running_loop()
+        executor = io_executor()
+        f = await loop.run_in_executor(executor, open, file_name, 'rt')
+        try:
+            while True:
+                lines = await loop.run_in_executor(executor, f.readlines, chunk_size)
+                if not lines:
+                    break
+                for line in lines:
+                    if line:
+                        yield line
+        finally:
+            await loop.run_in_executor(executor, f.close)
+
+    @staticmethod
+    async def async_save_text_file(file_path: str, txt_data):
+        """Save file in plaint text format without blocking the event loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(io_executor(), Util.save_text_file, file_path, txt_data)
+
+    @staticmethod
+    async def async_save_json_file(file_path: str, json_data):
+        """Save file in JSON format without blocking the event loop."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(io_executor(), Util.save_json_file, file_path, json_data)
+
+    @staticmethod
+    def read_csv_gen(file_name: str, schema: dict = None, delimiter: str = ',', fieldnames: list = None,
+                     restval: str = '', **fmtparams):
+        """Yield typed rows (dicts) of CSV/TSV file_name file.
+
+        schema: {column: spec}, spec is a TypeChecker subclass or instance (IntType,
+            UuidStringType and etc.), a date format for Util.date_parser or any callable.
+            Columns that are not in the schema are str.
+        fieldnames: column names (if the file has no header row)
+        restval: value of missing trailing cells of short rows (converted as an empty cell by default)
+        Converters are compiled once per column. Conversion error is raised as
+        ValueError with the line number and the column name.
+        """
+        assert (isinstance(file_name, str))
+        schema = schema or dict()
+        with open(file_name, 'rt', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f, delimiter=delimiter, **fmtparams)
+            if fieldnames is None:
+                fieldnames = next(reader, None)
+                if fieldnames is None:
+                    return
+            fieldnames = list(fieldnames)
+            missing = set(schema) - set(fieldnames)
+            if missing:
+                raise ValueError('{file}: columns {columns} are missing.'.format(file=file_name, columns=sorted(missing)))
+            converters = [(column, _csv_converter(spec)) for column, spec in schema.items()]
+            columns = len(fieldnames)
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) < columns:
+                    row += [restval] * (columns - len(row))
+                record = dict(zip(fieldnames, row))
+                for column, converter in converters:
+                    try:
+                        record[column] = converter(record[column])
+                    except (TypeError, ValueError) as conversion_error:
+                        raise ValueError('{file}:{line}: {column}: {err}'.format(
+                            file=file_name, line=reader.line_num, column=column, err=repr(conversion_error)))
+                yield record
+
+    @staticmethod
+    def save_csv_file(file_path: str, rows, fieldnames: list, schema: dict = None, delimiter: str = ',',
+                      batch_size: int = 1000, **fmtparams):
+        """Save rows (iterable of dicts) in CSV/TSV format.
+
+        schema: {column: spec} as for read_csv_gen (dates are formatted by Util.date_formatter,
+            list and dict columns are written as JSON, None is written as empty cell)
+        Rows are written by batches of batch_size, so generators are not materialized.
+        """
+        formatters = [(column, formatter) for column, formatter in
+                      ((column, _csv_formatter(spec)) for column, spec in (schema or dict()).items())
+                      if formatter is not None]
+        with io.open(file_path, mode='w', newline='', encoding='utf-8') as output_f:
+            writer = csv.writer(output_f, delimiter=delimiter, **fmtparams)
+            writer.writerow(fieldnames)
+            rows = iter(rows)
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                if formatters:
+                    batch = [dict(row, **{column: formatter(row.get(column)) for column, formatter in formatters})
+                             for row in batch]
+                writer.writerows([[row.get(column) for column in fieldnames] for row in batch])
+
+    @staticmethod
+    def parallel_map(func, iterable, backend: str = 'thread', workers: int = None, chunksize: int = None,
+                     ordered: bool = True, log=None, log_every: int = 10000):
+        """Yield func(item) for each item of iterable using a pool of workers.
+
+        backend: 'thread' or 'process' (func and items should be picklable)
+        workers: number of workers (default - number of CPUs)
+        chunksize: number of items sent to a worker at once (default 1 for threads, 64 for processes)
+        ordered: yield results in the input order (otherwise - as soon as they are ready)
+        log: Logging instance for progress (every log_every items) and total throughput messages
+        (process workers send their records to log.aggregation_queue if it is started)
+        Thread workers run func in the caller contextvars context (active tracing span, etc.).
+        The input is read lazily: no more than 2 * workers chunks are in flight,
+        so infinite generators (ex: read_file_gen) can be used.
+        func exception is raised as ParallelMapError with the failed item index.
+        """
+        assert backend in ('thread', 'process'), '{backend} is not a parallel_map backend.'.format(backend=backend)
+        import concurrent.futures
+        workers = workers or os.cpu_count() or 1
+        chunksize = chunksize or (1 if backend == 'thread' else 64)
+        executor_class = (concurrent.futures.ThreadPoolExecutor if backend == 'thread'
+                          else concurrent.futures.ProcessPoolExecutor)
+        max_pending = 2 * workers
+        iterator = iter(iterable)
+        progress = _Throughput(log, log_every)
+        pending = collections.deque() if ordered else set()
+        batches = dict()
+        submitted = 0
+
+        def submit(executor):
+            """Submit next chunk, return False if the input is exhausted."""
+            nonlocal submitted
+            items = list(itertools.islice(iterator, chunksize))
+            if not items:
+                return False
+            if backend == 'thread':
+                future = executor.submit(contextvars.copy_context().run, _map_batch, func, items)
+            else:
+                future = executor.submit(_map_batch, func, items)
+            batches[future] = (submitted, items)
+            submitted += len(items)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+            return True
+
+        def collect(future):
+            """Return chunk results or raise ParallelMapError."""
+            start, items = batches.pop(future)
+            results, offset, error = future.result()
+            if error is not None:
+                raise ParallelMapError(start + offset, items[offset], error) from error
+            progress.add(len(results))
+            return results
+
+        executor_kwargs = dict()
+        if backend == 'process' and getattr(log, 'aggregation_queue', None) is not None:
+            executor_kwargs = dict(initializer=log.init_worker, initargs=(log.aggregation_queue, log.log_lvl))
+        executor = executor_class(max_workers=workers, **executor_kwargs)
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    exhausted = not submit(executor)
+                if not pending:
+                    break
+                if ordered:
+                    yield from collect(pending.popleft())
+                else:
+                    done, __ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        pending.discard(future)
+                        yield from collect(future)
+            progress.finish()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
     def public_attrs(self) -> dict:
-        """Return dictionary of class public attributes and properties."""
-        result_dict = dict()
-        for attr in dir(self):
-            if attr.startswith('_'):
-                continue
-            if hasattr(self.__class__, attr) and callable(getattr(self.__class__, attr)):  # noqa
-                continue
-            attr_value = getattr(self.__class__, attr) if hasattr(self.__class__, attr) else self.__getattribute__(attr)  # noqa
-            if isinstance(attr_value, property):
+        """Return dictionary of class public attributes and properties.
+
+        Class attributes are classified once per class (see _ClassAttrs),
+        so only instance attributes are walked on each call.
+        """
+        class_attrs = _class_attrs(self.__class__)
+        class_values = class_attrs.class_values
+        skipped = class_attrs.skipped
+        instance_dict = getattr(self, '__dict__', {})
+
+        result_dict = dict(class_values)
+        for attr in class_attrs.instance_names:
+            result_dict[attr] = self.__getattribute__(attr)
+        for attr in instance_dict:
+            if attr.startswith('_') or attr in skipped or attr in result_dict:
                 continue
-            result_dict[attr] = attr_value
-        return result_dict
+            result_dict[attr] = instance_dict[attr]
+        return {attr: result_dict[attr] for attr in sorted(result_dict)}
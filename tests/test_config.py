@@ -1,12 +1,50 @@
 """Config tests."""
+import asyncio
+import copy
+import gc
 import io
 import json
+import logging
 import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
 import unittest
 import uuid
+import weakref
+from unittest import mock
 
+from dav_utils.config import Config, ConfigSources, FrozenDict, SchemaError
+from dav_utils.descriptors import BoolType, HttpMethod, IntType, ListType, StringType, UuidStringType
 
-from dav_utils.config import Config
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+class TenantConfig(Config):
+    """Config with extra descriptors."""
+
+    port = IntType('port')
+    method = HttpMethod('method')
+    tenant_id = UuidStringType('tenant_id')
+    timeout = 10
+
+
+class LayeredConfig(Config):
+    """Config with descriptors of layered sources values."""
+
+    json_param = IntType('json_param')
+    ini_param = ListType('ini_param')
+    env_param = BoolType('env_param')
+    cli_param = IntType('cli_param')
+    api_token = StringType('api_token')
 
 
 class TestConfig(unittest.TestCase):
@@ -18,7 +56,8 @@ class TestConfig(unittest.TestCase):
 
     def tearDown(self) -> None:
         """Remove temporary config file after each test case."""
-        os.remove(self._template_name)
+        if os.path.exists(self._template_name):
+            os.remove(self._template_name)
 
     def test_init_with_template(self):
         """Existing config loader test case."""
@@ -65,6 +104,220 @@ class TestConfig(unittest.TestCase):
         updated_cls.log.debug('test')
         self.assertTrue(True)
 
+    def test_async_load(self):
+        """Async config loader test case."""
+        cls = Config()
+        cls.create_template(self._template_name)
+        file_config = asyncio.run(cls.async_load(self._template_name))
+        self.assertEqual(cls.log_lvl, file_config['LOG_LVL'])
+
+    def test_reload(self):
+        """Config reload should apply only valid changes."""
+        cls = Config()
+        cls.create_template(self._template_name)
+        cls = Config(self._template_name)
+        self.assertEqual({}, cls.reload())
+
+        cls.save_json_file(self._template_name, {'LOG_FMT': 1, 'LOG_LVL': 'INFO'})
+        self.assertRaises(TypeError, cls.reload)
+        self.assertEqual('DEBUG', cls.log_lvl)
+
+        cls.save_json_file(self._template_name, {'LOG_LVL': 'INFO', 'NEW_PARAM': 1})
+        self.assertEqual({'log_lvl': ('DEBUG', 'INFO'), 'new_param': (None, 1)}, cls.reload())
+        self.assertEqual('INFO', cls.log_lvl)
+        self.assertEqual(logging.INFO, cls.log.root_logger.level)
+        cls.log.set_level('DEBUG')
+
+    def test_watch(self):
+        """Config watcher should reload changed file and notify subscribers."""
+        Config().create_template(self._template_name)
+        cls = Config(self._template_name)
+        changed = threading.Event()
+        diffs = list()
+
+        def subscriber(config, diff):
+            diffs.append(diff)
+            changed.set()
+
+        cls.subscribe(subscriber)
+        cls.watch(interval=0.01)
+        try:
+            cls.save_json_file(self._template_name, {'LOG_DATE_FMT': '%Y-%m-%d %H:%M:%S'})
+            self.assertTrue(changed.wait(5))
+        finally:
+            cls.stop_watching()
+        self.assertEqual([{'log_date_fmt': ('%H:%M:%S', '%Y-%m-%d %H:%M:%S')}], diffs)
+        self.assertEqual('%Y-%m-%d %H:%M:%S', cls.log_date_fmt)
+
+    def test_pickle(self):
+        """Config should be picklable and copyable (ex: for process pools)."""
+        cls = Config()
+        cls.param = [1]
+        cls.subscribe(lambda config, diff: None)
+        for copied in (pickle.loads(pickle.dumps(cls)), copy.deepcopy(cls)):
+            self.assertEqual(cls.public_attrs(), copied.public_attrs())
+            self.assertEqual({}, copied.reload())
+
+    def test_load_override(self):
+        """Config files should be read by overridden load method."""
+        class YamlConfig(Config):
+            def load(self, config_file: str):
+                return {'x': 1, 'source': config_file}
+
+        cls = YamlConfig('config.yaml')
+        self.assertEqual(1, cls.x)
+        self.assertEqual('config.yaml', cls.source)
+
+    def test_shared_sources(self):
+        """Sources shared by configs should be loaded by each config class load and schema."""
+        class PortConfig(Config):
+            port = IntType('port')
+
+            def load(self, config_file: str):
+                return {'loaded_by': 'PortConfig'}
+
+        sources = ConfigSources(overrides=['port=5'])
+        self.assertEqual('5', Config(sources=sources).port)
+        cls = PortConfig(sources=sources)
+        self.assertEqual(5, cls.port)
+        self.assertIsNone(sources.value_types)
+        sources.files.append('config.yaml')
+        self.assertEqual('PortConfig', PortConfig(sources=sources).loaded_by)
+
+    def test_layered_sources(self):
+        """Layered sources should be merged in order and validated by descriptors."""
+        Config.save_json_file(self._template_name, {'LOG_FMT': '%(message)s', 'LOG_LVL': 'INFO', 'JSON_PARAM': 1})
+        ini_name = self._template_name + '.ini'
+        Config.save_text_file(ini_name, '[logging]\nlog_lvl = WARNING\n[params]\nini_param = [1, 2]\nini_str = 10\n')
+        environ = {'APP_LOG_LVL': 'ERROR', 'APP_ENV_PARAM': 'true', 'APP_API_TOKEN': '12345', 'OTHER_PARAM': '1'}
+        sources = ConfigSources(defaults={'default_param': 0, 'log_lvl': 'DEBUG'},
+                                files=[self._template_name, ini_name],
+                                env_prefix='APP_',
+                                overrides=['cli_param=2', 'json_param=3', 'log_date_fmt=2020', 'unknown_param=4'])
+        try:
+            with mock.patch.dict(os.environ, environ):
+                cls = LayeredConfig(sources=sources)
+        finally:
+            os.remove(ini_name)
+
+        self.assertEqual(0, cls.default_param)
+        self.assertEqual('%(message)s', cls.log_fmt)
+        self.assertEqual('ERROR', cls.log_lvl)
+        self.assertEqual(3, cls.json_param)
+        self.assertEqual([1, 2], cls.ini_param)
+        self.assertEqual('10', cls.ini_str)
+        self.assertIs(True, cls.env_param)
+        self.assertEqual(2, cls.cli_param)
+        self.assertEqual('12345', cls.api_token)
+        self.assertEqual('2020', cls.log_date_fmt)
+        self.assertEqual('4', cls.unknown_param)
+        self.assertFalse(hasattr(cls, 'other_param'))
+
+        self.assertIsNot(sources, cls.sources)
+        self.assertIsNone(sources.loader)
+        snapshot = cls.sources.snapshot()
+        self.assertEqual('ERROR', snapshot['log_lvl'])
+        plain_sources = ConfigSources(defaults={'log_lvl': 'INFO'})
+        plain_sources.snapshot()
+        self.assertEqual({'log_lvl': 'INFO'}, pickle.loads(pickle.dumps(plain_sources)).snapshot())
+        with self.assertRaises(TypeError):
+            snapshot['log_lvl'] = 'INFO'
+
+        invalid_sources = ConfigSources(overrides={'log_fmt': 1})
+        self.assertRaises(TypeError, Config, sources=invalid_sources)
+        self.assertRaises(ValueError, ConfigSources(overrides=['bad_override']).snapshot)
+
+    def test_freeze(self):
+        """Frozen config snapshot test case."""
+        cls = Config()
+        cls.list_param = [1, {'key': [2]}]
+        frozen = cls.freeze()
+        self.assertEqual('DEBUG', frozen.log_lvl)
+        self.assertEqual((1, {'key': (2,)}), frozen.list_param)
+        self.assertIsInstance(frozen.list_param[1], FrozenDict)
+        self.assertEqual(hash(frozen), hash(cls.freeze()))
+        self.assertEqual(frozen, cls.freeze())
+        self.assertRaises(AttributeError, setattr, frozen, 'log_lvl', 'INFO')
+        self.assertRaises(AttributeError, getattr, frozen, 'missing_param')
+        self.assertRaises(TypeError, frozen.list_param[1].update, {'key': 1})
+        with self.assertRaises(TypeError):
+            frozen.list_param[1]['key'] = 1
+
+        unpickled = pickle.loads(pickle.dumps(frozen))
+        self.assertEqual(frozen, unpickled)
+        self.assertEqual(hash(frozen), hash(unpickled))
+
+        thawed = unpickled.thaw()
+        self.assertIsInstance(thawed, Config)
+        self.assertEqual([1, {'key': [2]}], thawed.list_param)
+        self.assertEqual(cls.public_attrs(), thawed.public_attrs())
+        self.assertEqual(logging.DEBUG, frozen.logging().root_logger.level)
+
+    def test_schema(self):
+        """Compiled schema should report all errors at once."""
+        schema = TenantConfig.schema()
+        self.assertIs(schema, TenantConfig.schema())
+        valid = {'PORT': 80, 'METHOD': 'get', 'TENANT_ID': 'ac158335-a0e2-4e59-b722-08328b2985d4',
+                 'TIMEOUT': 5, 'LOG_LVL': 'INFO'}
+        self.assertEqual({}, schema.validate(valid))
+        schema.check(valid)
+
+        invalid = {'PORT': '80', 'METHOD': 'BAD', 'TENANT_ID': 'bad', 'LOG_LVL': 1, 'EXTRA': 1,
+                   '_private': 1, 'update': 1}
+        errors = schema.validate(invalid)
+        self.assertEqual(set(invalid), set(errors))
+        with self.assertRaises(SchemaError) as context:
+            schema.check(invalid)
+        self.assertEqual(errors, context.exception.errors)
+        self.assertEqual({}, TenantConfig.schema(allow_unknown=True).validate({'EXTRA': 1}))
+        self.assertIn('', schema.validate([]))
+
+        TenantConfig.region = 'eu'
+        try:
+            self.assertEqual({}, TenantConfig.schema().validate({'REGION': 'us'}))
+        finally:
+            del TenantConfig.region
+        self.assertIn('REGION', TenantConfig.schema().validate({'REGION': 'us'}))
+
+        config_class = type('TemporaryConfig', (Config,), {})
+        schema = weakref.ref(config_class.schema())
+        del config_class
+        gc.collect()
+        self.assertIsNone(schema())
+
+    def test_schema_validate_dir(self):
+        """Config files directory should be validated in a process pool."""
+        directory = tempfile.mkdtemp()
+        try:
+            for idx in range(6):
+                Config.save_json_file(os.path.join(directory, '{}.json'.format(idx)), {'LOG_LVL': 'INFO'})
+            Config.save_json_file(os.path.join(directory, 'bad.json'), {'LOG_LVL': 1, 'EXTRA': 1})
+            Config.save_text_file(os.path.join(directory, 'broken.json'), '{')
+            Config.save_text_file(os.path.join(directory, 'readme.txt'), 'not a config')
+
+            Config.save_text_file(os.path.join(directory, 'config.toml'), 'log_lvl = "INFO"\n')
+            with mock.patch.dict(sys.modules, {'tomllib': None, 'tomli': None}):
+                errors = Config.schema().validate_file(os.path.join(directory, 'config.toml'))
+            self.assertIn('tomli', errors[''])
+            os.remove(os.path.join(directory, 'config.toml'))
+
+            for workers in (1, 2):
+                result = Config.schema().validate_dir(directory, workers=workers)
+                self.assertEqual({'bad.json', 'broken.json'}, {os.path.basename(path) for path in result})
+                self.assertEqual({'LOG_LVL', 'EXTRA'}, set(result[os.path.join(directory, 'bad.json')]))
+                self.assertIn('', result[os.path.join(directory, 'broken.json')])
+        finally:
+            shutil.rmtree(directory)
+
+    @unittest.skipIf(tomllib is None, 'tomllib is not available')
+    def test_load_toml(self):
+        """TOML config loader test case."""
+        self._template_name = self._template_name.replace('.json', '.toml')
+        Config.save_text_file(self._template_name, 'log_lvl = "INFO"\n[params]\ncount = 1\n')
+        cls = Config(self._template_name)
+        self.assertEqual('INFO', cls.log_lvl)
+        self.assertEqual({'count': 1}, cls.params)
+
 
 if __name__ == '__main__':
     unittest.main()
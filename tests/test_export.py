@@ -0,0 +1,107 @@
+"""Columnar export tests."""
+import os
+import tempfile
+import unittest
+
+from dav_utils.descriptors import (BoolType, DictType, HttpMethod, IntType, NullableIntType, StringType,
+                                   UuidStringType)
+from dav_utils.export import ColumnarExporter, record_descriptors
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+
+class BaseRecord:
+    """Record with base fields."""
+
+    id = IntType('id')  # noqa: A003
+    name = StringType('name')
+
+
+class Record(BaseRecord):
+    """Record with all exported field types."""
+
+    uid = UuidStringType('uid')
+    method = HttpMethod('method')
+    count = NullableIntType('count')
+    flag = BoolType('flag')
+    extra = DictType('extra')
+
+    def __init__(self, idx):
+        """Fill fields."""
+        self.id = idx
+        self.name = 'name {}'.format(idx)
+        self.uid = 'ac158335-a0e2-4e59-b722-08328b2985d4' if idx % 2 else None
+        self.method = 'GET'
+        self.count = idx if idx % 3 else None
+        self.flag = bool(idx % 2)
+        self.extra = {'idx': idx}
+
+
+class TestColumnarExporter(unittest.TestCase):
+    """ColumnarExporter test cases."""
+
+    def test_record_descriptors(self):
+        """Descriptors should be collected from base classes first."""
+        self.assertEqual(['id', 'name', 'uid', 'method', 'count', 'flag', 'extra'],
+                         list(record_descriptors(Record)))
+
+    def test_batches(self):
+        """Records should be split by batch_size and dict records validated."""
+        exporter = ColumnarExporter(Record, fields=['id', 'count'], batch_size=4)
+        batches = list(exporter.batches(Record(idx) for idx in range(10)))
+        self.assertEqual([4, 4, 2], [len(batch['id']) for batch in batches])
+        self.assertEqual([None, 1, 2, None], batches[0]['count'])
+
+        batches = list(exporter.batches([{'id': 1}, {'id': 2, 'count': 3}]))
+        self.assertEqual({'id': [1, 2], 'count': [None, 3]}, batches[0])
+        with self.assertRaises(ValueError) as context:
+            list(exporter.batches([{'id': 1}] * 5 + [{'id': '6'}]))
+        self.assertIn('record #5: id', str(context.exception))
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy_batches(self):
+        """Records should be exported to numpy structured arrays."""
+        exporter = ColumnarExporter(Record, batch_size=4)
+        arrays = list(exporter.numpy_batches(Record(idx) for idx in range(6)))
+        self.assertEqual([4, 2], [len(array) for array in arrays])
+        array = arrays[0]
+        self.assertEqual([0, 1, 2, 3], array['id'].tolist())
+        self.assertEqual('name 3', array['name'][3])
+        self.assertEqual([None, 'ac158335-a0e2-4e59-b722-08328b2985d4'], array['uid'][:2].tolist())
+        self.assertEqual(numpy.object_, array['uid'].dtype.type)
+        self.assertEqual(numpy.str_, array['name'].dtype.type)
+        self.assertTrue(numpy.isnan(array['count'][0]))
+        self.assertEqual(2.0, array['count'][2])
+        self.assertEqual(numpy.bool_, array['flag'].dtype.type)
+        self.assertEqual({'idx': 1}, array['extra'][1])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_arrow_batches(self):
+        """Records should be exported to Arrow record batches and Parquet."""
+        exporter = ColumnarExporter(Record, batch_size=4)
+        batches = list(exporter.arrow_batches(Record(idx) for idx in range(6)))
+        self.assertEqual([4, 2], [batch.num_rows for batch in batches])
+        self.assertEqual([None, 1, 2, None], batches[0].column('count').to_pylist())
+        self.assertEqual('{"idx": 0}', batches[0].column('extra')[0].as_py())
+
+        file_descriptor, file_path = tempfile.mkstemp(suffix='.parquet')
+        os.close(file_descriptor)
+        try:
+            self.assertEqual(6, exporter.to_parquet((Record(idx) for idx in range(6)), file_path))
+            table = pyarrow.parquet.read_table(file_path)
+        finally:
+            os.remove(file_path)
+        self.assertEqual(list(range(6)), table.column('id').to_pylist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Package import time tests."""
+import os
+import subprocess
+import sys
+import unittest
+
+
+class TestImport(unittest.TestCase):
+    """Import time regression test cases."""
+
+    # Heavy modules that should be imported only on first use
+    deferred_modules = frozenset(['asyncio', 'concurrent.futures', 'configparser', 'inspect', 'numpy',
+                                  'tomllib', 'tomli', 'uuid', 'multiprocessing'])
+
+    @staticmethod
+    def imported_modules(statement: str) -> set:
+        """Return modules imported by statement in a fresh interpreter (-X importtime report)."""
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                                cwd=project_dir, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        modules = set()
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                modules.add(line.rsplit('|', 1)[1].strip())
+        return modules
+
+    def test_package_import(self):
+        """Package import should not import submodules."""
+        modules = self.imported_modules('import dav_utils')
+        self.assertIn('dav_utils', modules)
+        self.assertFalse({'dav_utils.config', 'dav_utils.logger', 'dav_utils.utils'} & modules)
+
+    def test_submodules_import(self):
+        """Submodules import should not import heavy modules used in rare paths."""
+        modules = self.imported_modules('import dav_utils.config, dav_utils.descriptors, dav_utils.utils')
+        self.assertIn('dav_utils.config', modules)
+        self.assertEqual(set(), self.deferred_modules & modules)
+
+    def test_lazy_submodule(self):
+        """Submodule should be imported on attribute access."""
+        import dav_utils
+        self.assertIn('config', dir(dav_utils))
+        self.assertTrue(hasattr(dav_utils.config, 'Config'))
+        self.assertRaises(AttributeError, getattr, dav_utils, 'missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,24 @@
 """Logging tests."""
+import gc
 import logging
 import os
+import sys
+import tempfile
 import unittest
 import uuid
+import weakref
 
 from dav_utils.logger import Logging
+from dav_utils.utils import Util
+
+
+def log_item(item):
+    """Write worker process messages (with re-created Logging every second item)."""
+    if item % 2:
+        Logging('%H:%M:%S', '%(message)s', 'DEBUG').info('worker item %d', item)
+    else:
+        logging.getLogger('dav_utils.logger').info('worker item %d', item)
+    return item
 
 
 class TestLogging(unittest.TestCase):
@@ -27,8 +41,8 @@ class TestLogging(unittest.TestCase):
         logger = Logging(log_date_fmt='%H:%M:%S',
                          log_fmt='%(asctime)s.%(msecs)d|%(levelname).1s|%(message)s',
                          log_lvl='DEBUG')
-        test_file_handler = logging.FileHandler(cls._temp_log)
-        logger.root_logger.addHandler(test_file_handler)
+        cls._file_handler = logging.FileHandler(cls._temp_log)
+        logger.root_logger.addHandler(cls._file_handler)
         cls._instance_class_being_tested = logger
 
     @classmethod
@@ -67,6 +81,82 @@ class TestLogging(unittest.TestCase):
         self._instance_class_being_tested.critical('critical')
         self.assertIn(message, self.last_log_line)
 
+    def test_capture_debug(self):
+        """Suppressed debug messages should be dumped before error."""
+        logger = self._instance_class_being_tested
+        logger.set_level('INFO')
+        logger.capture_debug(size=3)
+        try:
+            for idx in range(5):
+                logger.debug('captured %d', idx)
+            with open(self._temp_log, 'r') as log_file:
+                self.assertNotIn('captured', log_file.read())
+            logger.error('failed')
+            with open(self._temp_log, 'r') as log_file:
+                lines = log_file.readlines()[-4:]
+            self.assertEqual(['captured 2', 'captured 3', 'captured 4', 'failed'],
+                             [line.strip() for line in lines])
+            self.assertEqual(0, logger.dump_debug())
+        finally:
+            logger.stop_capture()
+            logger.set_level('DEBUG')
+
+    def test_capture_debug_excepthook(self):
+        """Captured debug messages should be dumped to file on unhandled exception."""
+        logger = self._instance_class_being_tested
+        file_descriptor, dump_file = tempfile.mkstemp()
+        os.close(file_descriptor)
+        hook_calls = list()
+        default_hook = sys.excepthook
+        sys.excepthook = lambda *exc_info: hook_calls.append(exc_info[0])
+        logger.set_level('ERROR')
+        logger.capture_debug(size=10, dump_file=dump_file)
+        try:
+            logger.debug('context %s', 'value')
+            sys.excepthook(ValueError, ValueError('error'), None)
+            with open(dump_file) as log_file:
+                lines = log_file.readlines()
+            self.assertEqual(1, len(lines))
+            self.assertTrue(lines[0].endswith('|D|context value\n'))
+            self.assertEqual([ValueError], hook_calls)
+        finally:
+            logger.stop_capture()
+            logger.set_level('DEBUG')
+            sys.excepthook = default_hook
+            os.remove(dump_file)
+
+    def test_capture_debug_release(self):
+        """Capturing Logging should be deleted with its exception hooks."""
+        default_hook = sys.excepthook
+        temporary_logger = Logging(log_date_fmt='%H:%M:%S', log_fmt='%(message)s', log_lvl='INFO')
+        temporary_logger.capture_debug(size=10)
+        self.assertIsNot(default_hook, sys.excepthook)
+        logger_ref = weakref.ref(temporary_logger)
+        del temporary_logger
+        gc.collect()
+        self.assertIsNone(logger_ref())
+        self.assertIs(default_hook, sys.excepthook)
+        # Logging instances share the logger, restore the test logger configuration
+        self._instance_class_being_tested.root_logger.addHandler(self._file_handler)
+        self._instance_class_being_tested.set_level('DEBUG')
+
+    def test_aggregation(self):
+        """Worker processes records should be written by the parent handlers."""
+        logger = self._instance_class_being_tested
+        log_queue = logger.start_aggregation(batch_size=4)
+        self.assertIs(log_queue, logger.aggregation_queue)
+        try:
+            results = list(Util.parallel_map(log_item, range(20), backend='process', workers=2, chunksize=3,
+                                             log=logger))
+        finally:
+            logger.stop_aggregation()
+        self.assertEqual(list(range(20)), results)
+        self.assertIsNone(logger.aggregation_queue)
+        with open(self._temp_log, 'r') as log_file:
+            lines = [line.strip() for line in log_file if line.startswith('worker item')]
+        self.assertEqual(['worker item {}'.format(item) for item in range(20)],
+                         sorted(lines, key=lambda line: int(line.split()[-1])))
+
 
 if __name__ == '__main__':
     unittest.main()
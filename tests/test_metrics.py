@@ -0,0 +1,76 @@
+"""Metrics sampler tests."""
+import gc
+import json
+import os
+import tempfile
+import unittest
+
+from dav_utils.config import Config
+from dav_utils.metrics import METRICS, MetricsSampler
+
+
+class TestMetricsSampler(unittest.TestCase):
+    """MetricsSampler test cases."""
+
+    def setUp(self) -> None:
+        """Create temporary directory for metrics files."""
+        self._temp_dir = tempfile.mkdtemp()
+        self._json_file = os.path.join(self._temp_dir, 'metrics.jsonl')
+        self._prometheus_file = os.path.join(self._temp_dir, 'metrics.prom')
+
+    def tearDown(self) -> None:
+        """Remove temporary directory."""
+        for name in os.listdir(self._temp_dir):
+            os.remove(os.path.join(self._temp_dir, name))
+        os.rmdir(self._temp_dir)
+
+    def test_sample(self):
+        """Sample should contain known metrics."""
+        metrics = MetricsSampler().sample()
+        self.assertTrue(set(metrics) <= set(METRICS))
+        for name in ('cpu_user_seconds_total', 'cpu_system_seconds_total', 'threads', 'gc_collections_total'):
+            self.assertIn(name, metrics)
+        self.assertGreater(metrics['threads'], 0)
+
+    def test_emit(self):
+        """Sample should be written to log, JSON lines and Prometheus files."""
+        messages = list()
+
+        class Log:
+            info = error = messages.append
+
+        sampler = MetricsSampler(log=Log(), json_file=self._json_file, prometheus_file=self._prometheus_file)
+        metrics = sampler.emit()
+        sampler.emit()
+
+        self.assertTrue(messages[0].startswith('metrics: '))
+        with open(self._json_file) as json_file:
+            samples = [json.loads(line) for line in json_file]
+        self.assertEqual(2, len(samples))
+        self.assertEqual(metrics['threads'], samples[0]['threads'])
+        with open(self._prometheus_file) as prometheus_file:
+            text = prometheus_file.read()
+        self.assertIn('# TYPE dav_utils_process_cpu_user_seconds_total counter', text)
+        self.assertIn('dav_utils_process_threads {}'.format(metrics['threads']), text)
+        self.assertEqual(['metrics.jsonl', 'metrics.prom'], sorted(os.listdir(self._temp_dir)))
+
+    def test_background_sampling(self):
+        """Started sampler should measure garbage collections pause and emit on stop."""
+        cfg = Config()
+        cfg.metrics_interval = 0.01
+        cfg.metrics_log = False
+        cfg.metrics_json_file = self._json_file
+        sampler = MetricsSampler.from_config(cfg)
+        before = sampler.sample()
+        with sampler:
+            gc.collect()
+            metrics = sampler.sample()
+        # counters are lifetime totals, they do not reset on start
+        self.assertGreater(metrics['gc_collections_total'], before['gc_collections_total'])
+        self.assertGreaterEqual(metrics['gc_collected_objects_total'], before['gc_collected_objects_total'])
+        self.assertGreater(metrics['gc_pause_seconds_total'], 0)
+        self.assertTrue(os.path.exists(self._json_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Tracing tests."""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from dav_utils import tracing
+from dav_utils.logger import Logging
+from dav_utils.tracing import current_span, span
+from dav_utils.utils import Util
+
+
+class TestTracing(unittest.TestCase):
+    """span / Chrome trace export test cases."""
+
+    def setUp(self):
+        """Start spans export to temporary file."""
+        file_descriptor, self.trace_file = tempfile.mkstemp(suffix='.json')
+        os.close(file_descriptor)
+        tracing.start_export(self.trace_file, buffer_size=2)
+
+    def tearDown(self):
+        """Stop export and remove temporary file."""
+        tracing.stop_export()
+        os.remove(self.trace_file)
+
+    def events(self) -> list:
+        """Return exported trace events."""
+        tracing.stop_export()
+        with open(self.trace_file) as trace_file:
+            content = trace_file.read()
+        self.assertTrue(content.startswith('[\n'))
+        return json.loads(content.rstrip(',\n') + ']')
+
+    def test_nested_spans(self):
+        """Nested spans should share trace_id and be exported in completion order."""
+        with span('outer', stage=1) as outer:
+            with span('inner') as inner:
+                self.assertIs(inner, current_span())
+            self.assertIs(outer, current_span())
+        self.assertIsNone(current_span())
+        self.assertEqual(outer.trace_id, inner.trace_id)
+        self.assertEqual(outer.span_id, inner.parent_id)
+        self.assertGreaterEqual(outer.duration, inner.duration)
+
+        events = self.events()
+        self.assertEqual(['inner', 'outer'], [event['name'] for event in events])
+        self.assertEqual({'X'}, {event['ph'] for event in events})
+        self.assertEqual(1, events[1]['args']['stage'])
+        self.assertEqual(outer.span_id, events[0]['args']['parent_id'])
+
+    def test_decorator(self):
+        """Each decorated call should run in a new span (threads and asyncio tasks too)."""
+        @span('item')
+        def item(value):
+            return current_span().parent_id
+
+        @span('task')
+        async def task():
+            await asyncio.sleep(0)
+            return current_span()
+
+        with span('root') as root:
+            parents = list(Util.parallel_map(item, range(3), workers=2))
+
+            async def gather():
+                return await asyncio.gather(task(), task())
+            tasks = asyncio.run(gather())
+        self.assertEqual([root.span_id] * 3, parents)
+        self.assertNotEqual(tasks[0].span_id, tasks[1].span_id)
+        self.assertEqual({root.span_id}, {task_span.parent_id for task_span in tasks})
+        self.assertEqual(6, len(self.events()))
+
+    def test_error(self):
+        """Span exception should be exported in args."""
+        with self.assertRaises(ValueError):
+            with span('failed'):
+                raise ValueError('error')
+        self.assertEqual("ValueError('error')", self.events()[0]['args']['error'])
+
+    def test_logging_record(self):
+        """Logging records should have trace_id and span_id of the active span."""
+        logger = Logging('%H:%M:%S', '%(trace_id)s|%(span_id)s|%(message)s', 'DEBUG')
+        records = list()
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger.root_logger.addHandler(handler)
+        logger.info('outside')
+        with span('logged', log=logger) as logged:
+            logger.info('inside')
+        self.assertEqual(('', ''), (records[0].trace_id, records[0].span_id))
+        self.assertEqual((logged.trace_id, logged.span_id), (records[1].trace_id, records[1].span_id))
+        self.assertTrue(records[2].getMessage().startswith('span logged: '))
+
+        logger.set_level('INFO')
+        logger.capture_debug(size=10)
+        try:
+            with span('captured') as captured:
+                logger.debug('captured')
+            with span('failed'):
+                logger.error('failed')
+        finally:
+            logger.stop_capture()
+        self.assertEqual(['captured', 'failed'], [record.getMessage() for record in records[3:]])
+        self.assertEqual(captured.span_id, records[3].span_id)
+        logger.root_logger.removeHandler(handler)
+
+
+if __name__ == '__main__':
+    unittest.main()
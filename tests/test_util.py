@@ -1,14 +1,25 @@
 """Util and TypeChecker descriptors tests."""
+import asyncio
 import datetime
+import decimal
+import itertools
+import json
 import os
+import pickle
+import time
 import unittest
 import uuid
 from collections.abc import Iterable
 
-from dav_utils.descriptors import (BoolType, DictType, HttpMethod, IntType, ListType,
+from dav_utils.descriptors import (BoolType, DictType, EnumStringType, HttpMethod, IntType, ListType,
                                    NullableDictType, NullableIntType, NullableStringType, StringType,
-                                   UuidStringType, WritableFile, argument_type_checker)
-from dav_utils.utils import Util
+                                   TypeChecker, UuidStringType, WritableFile, argument_type_checker)
+from dav_utils.utils import ParallelMapError, Util
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
 
 
 class TestUtil(unittest.TestCase):
@@ -54,6 +65,45 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(cls._private_attr, 'private_value')
         self.assertEqual(cls.public_attr, 'updated')
 
+    def test_public_attrs_class_mutation(self):
+        """Cached class attributes classification should follow class changes."""
+
+        class Mutable(Util):
+            class_attr = 'class_value'
+            str_type = StringType('str_type')
+
+            @property
+            def prop(self):
+                return None
+
+        cls = Mutable()
+        cls.str_type = 'str_value'
+        self.assertEqual({'class_attr': 'class_value', 'str_type': 'str_value'}, cls.public_attrs())
+
+        Mutable.new_class_attr = 'new'
+        Mutable.new_method = lambda self: None
+        self.assertIn('new_class_attr', cls.public_attrs())
+        self.assertNotIn('new_method', cls.public_attrs())
+        cls.update({'new_method': 'updated', 'NEW_ATTR': 'updated'})
+        self.assertEqual('updated', cls.new_attr)
+        self.assertTrue(callable(cls.new_method))
+
+        del Mutable.class_attr
+        self.assertNotIn('class_attr', cls.public_attrs())
+
+        class Mixin:
+            pass
+
+        class WithMixin(Mixin, Util):
+            pass
+
+        instance = WithMixin()
+        self.assertEqual({}, instance.public_attrs())
+        Mixin.x = 1
+        self.assertEqual({'x': 1}, instance.public_attrs())
+        Mixin.x = 2
+        self.assertEqual({'x': 2}, instance.public_attrs())
+
     def test_check_exists(self):
         """File exists checker test case.."""
         cls = self._instance_class_being_tested
@@ -134,6 +184,165 @@ class TestUtil(unittest.TestCase):
         else:
             self.assertFalse(True)
 
+    def test_date_parser(self):
+        """Compiled str to date converters should give the same result as strptime."""
+        cls = self._instance_class_being_tested
+        values = ['2020-04-18', '2020-4-18', '18.04.2020', '20200418', '2020-02-30', '0999-01-01', '']
+        for date_fmt in ('%Y-%m-%d', '%d.%m.%Y', '%Y%m%d', '%Y-%m-%d %H'):
+            parser = cls.date_parser(date_fmt)
+            for value in values:
+                try:
+                    expected = datetime.datetime.strptime(value, date_fmt).date()
+                except ValueError:
+                    self.assertRaises(ValueError, parser, value)
+                else:
+                    self.assertEqual(expected, parser(value))
+
+    def test_str_to_dates(self):
+        """Bulk str to date converter test case."""
+        cls = self._instance_class_being_tested
+        result = cls.str_to_dates([self._valid_date_str, self._valid_date_str], self._date_fmt)
+        self.assertEqual([datetime.date(2020, 4, 18)] * 2, result)
+        self.assertRaises(ValueError, cls.str_to_dates, [self._valid_date_str, self._invalid_date_str],
+                          self._date_fmt)
+        self.assertRaises(ValueError, cls.str_to_dates, [None], self._date_fmt)
+
+    def test_dates_to_str(self):
+        """Bulk date to str converter test case."""
+        cls = self._instance_class_being_tested
+        dates = [datetime.date(2020, 4, 18), datetime.datetime(999, 1, 2, 3, 4)]
+        for date_fmt in ('%Y-%m-%d', '{%d.%m.%Y}', '%Y-%m-%d %H'):
+            expected = [datetime.datetime.strftime(date, date_fmt) for date in dates]
+            self.assertEqual(expected, cls.dates_to_str(dates, date_fmt))
+        self.assertRaises(ValueError, cls.dates_to_str, [self._invalid_date_str], self._date_fmt)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_str_to_datetime64(self):
+        """Vectorized str to datetime64 converter test case."""
+        cls = self._instance_class_being_tested
+        values = ['18.04.2020', '29.02.2019', '1.1.2020', None, '18.04.2020 ', '31.12.9999']
+        dates, invalid = cls.str_to_datetime64(values, '%d.%m.%Y')
+        self.assertEqual([1, 3, 4], list(invalid))
+        self.assertTrue(numpy.isnat(dates[invalid]).all())
+        self.assertEqual(numpy.datetime64('2020-04-18'), dates[0])
+        self.assertEqual(numpy.datetime64('2020-01-01'), dates[2])
+        self.assertEqual(numpy.datetime64('9999-12-31'), dates[5])
+
+        dates, invalid = cls.str_to_datetime64(iter(['2020-04-18 10', 'bad']), '%Y-%m-%d %H')
+        self.assertEqual([1], list(invalid))
+        self.assertEqual(numpy.datetime64('2020-04-18'), dates[0])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_datetime64_to_str(self):
+        """Vectorized datetime64 to str converter test case."""
+        cls = self._instance_class_being_tested
+        dates = numpy.array(['2020-04-18', 'NaT', '1000-01-02'], dtype='datetime64[D]')
+        date_strs, invalid = cls.datetime64_to_str(dates, '%d.%m.%Y')
+        self.assertEqual(['18.04.2020', '', '02.01.1000'], list(date_strs))
+        self.assertEqual([1], list(invalid))
+
+        date_strs, invalid = cls.datetime64_to_str([datetime.date(2020, 4, 18)], '%Y-%m-%d %H')
+        self.assertEqual(['2020-04-18 00'], list(date_strs))
+        self.assertEqual([], list(invalid))
+
+    def test_parallel_map(self):
+        """Parallel map with thread and process backends test case."""
+        cls = self._instance_class_being_tested
+        items = list(range(-50, 50))
+        self.assertEqual([item * 2 for item in items], list(cls.parallel_map(lambda item: item * 2, items, workers=4)))
+        self.assertEqual(sorted(abs(item) for item in items),
+                         sorted(cls.parallel_map(abs, items, workers=4, ordered=False)))
+        self.assertEqual([abs(item) for item in items],
+                         list(cls.parallel_map(abs, iter(items), backend='process', workers=2, chunksize=7)))
+
+        messages = list()
+
+        class Log:
+            debug = info = messages.append
+
+        list(cls.parallel_map(abs, items, workers=2, log=Log(), log_every=10))
+        self.assertTrue(messages)
+        self.assertIn('100 items', messages[-1])
+
+    def test_parallel_map_bounded_input(self):
+        """Parallel map should read infinite input lazily."""
+        cls = self._instance_class_being_tested
+        consumed = itertools.count()
+
+        def infinite():
+            for item in itertools.count():
+                next(consumed)
+                yield item
+
+        results = cls.parallel_map(lambda item: item, infinite(), workers=2, chunksize=5)
+        self.assertEqual(list(range(20)), list(itertools.islice(results, 20)))
+        results.close()
+        # no more than 2 * workers chunks are read ahead of the yielded results
+        self.assertLessEqual(next(consumed), 20 + 2 * 2 * 5)
+
+    def test_parallel_map_error(self):
+        """Parallel map should raise func error with the item context."""
+        cls = self._instance_class_being_tested
+        for backend in ('thread', 'process'):
+            with self.assertRaises(ParallelMapError) as context:
+                list(cls.parallel_map(abs, [1, -2, 'bad', 3], backend=backend, workers=2, chunksize=2))
+            self.assertEqual(2, context.exception.index)
+            self.assertEqual('bad', context.exception.item)
+            self.assertIsInstance(context.exception.__cause__, TypeError)
+        error = pickle.loads(pickle.dumps(context.exception))
+        self.assertEqual((2, 'bad'), (error.index, error.item))
+        self.assertEqual(str(context.exception), str(error))
+
+    def test_csv_files(self):
+        """Typed CSV/TSV writer and reader test case."""
+        cls = self._instance_class_being_tested
+        file_path = __file__ + self._temp_value
+        schema = {'id': IntType, 'uid': UuidStringType, 'day': '%d.%m.%Y', 'flag': BoolType,
+                  'count': NullableIntType, 'tags': ListType}
+        rows = [{'id': 1, 'name': 'a, b', 'uid': 'ac158335-a0e2-4e59-b722-08328b2985d4',
+                 'day': datetime.date(2020, 4, 18), 'flag': True, 'count': None, 'tags': [1, 2]},
+                {'id': 2, 'name': 'c', 'uid': None, 'day': datetime.date(2020, 4, 19), 'flag': False,
+                 'count': 3, 'tags': []}]
+        fieldnames = ['id', 'name', 'uid', 'day', 'flag', 'count', 'tags']
+        try:
+            for delimiter in (',', '\t'):
+                cls.save_csv_file(file_path, iter(rows), fieldnames, schema, delimiter=delimiter, batch_size=1)
+                self.assertEqual(rows, list(cls.read_csv_gen(file_path, schema, delimiter=delimiter)))
+
+            cls.save_text_file(file_path, '1,bad\n')
+            self.assertEqual([{'id': 1, 'uid': 'bad'}],
+                             list(cls.read_csv_gen(file_path, {'id': IntType}, fieldnames=['id', 'uid'])))
+            with self.assertRaises(ValueError) as context:
+                list(cls.read_csv_gen(file_path, {'uid': UuidStringType}, fieldnames=['id', 'uid']))
+            self.assertIn(':1: uid:', str(context.exception))
+            self.assertRaises(ValueError, list, cls.read_csv_gen(file_path, {'missing': IntType}))
+
+            cls.save_text_file(file_path, 'tags\tmeta\n[1]\t{"a": 1}\n5\t[1]\n{"a": 1}\t{}\n')
+            json_schema = {'tags': ListType, 'meta': DictType}
+            self.assertEqual({'tags': [1], 'meta': {'a': 1}},
+                             next(cls.read_csv_gen(file_path, json_schema, delimiter='\t')))
+            with self.assertRaises(ValueError) as context:
+                list(cls.read_csv_gen(file_path, json_schema, delimiter='\t'))
+            self.assertIn(':3: tags:', str(context.exception))
+            with self.assertRaises(ValueError) as context:
+                list(cls.read_csv_gen(file_path, {'meta': DictType}, delimiter='\t'))
+            self.assertIn(':3: meta:', str(context.exception))
+            cls.save_text_file(file_path, 'tags\n{"a": 1}\n')
+            with self.assertRaises(ValueError) as context:
+                list(cls.read_csv_gen(file_path, {'tags': ListType}))
+            self.assertIn(':2: tags:', str(context.exception))
+            self.assertRaises(TypeError, list, cls.read_csv_gen(file_path, {'tags': TypeChecker('tags', decimal.Decimal)}))
+
+            cls.save_text_file(file_path, 'id,name,day\n1,a,18.04.2020\n2,b\n')
+            self.assertEqual([{'id': 1, 'name': 'a', 'day': '18.04.2020'}, {'id': 2, 'name': 'b', 'day': ''}],
+                             list(cls.read_csv_gen(file_path, {'id': IntType})))
+            self.assertEqual(None, list(cls.read_csv_gen(file_path, {'day': lambda value: value or None}))[1]['day'])
+            with self.assertRaises(ValueError) as context:
+                list(cls.read_csv_gen(file_path, {'day': '%d.%m.%Y'}))
+            self.assertIn(':3: day:', str(context.exception))
+        finally:
+            os.remove(file_path)
+
     def test_read_file_gen(self):
         """Read file generator test case."""
         cls = self._instance_class_being_tested
@@ -179,6 +388,58 @@ class TestUtil(unittest.TestCase):
         os.remove(file_path)
         self.assertTrue(True)
 
+    def test_async_read_file_gen(self):
+        """Async read file generator should not block the event loop."""
+        cls = self._instance_class_being_tested
+        file_path = __file__ + self._temp_value
+        lines_count = 200000
+        cls.save_text_file(file_path, ('line {}\n'.format(i) for i in range(lines_count)))
+
+        async def ticker(stop, lags):
+            interval = 0.005
+            while not stop.is_set():
+                started = time.monotonic()
+                await asyncio.sleep(interval)
+                lags.append(time.monotonic() - started - interval)
+
+        async def read():
+            stop = asyncio.Event()
+            lags = list()
+            ticker_task = asyncio.ensure_future(ticker(stop, lags))
+            lines = list()
+            async for line in cls.async_read_file_gen(file_path):
+                lines.append(line)
+            stop.set()
+            await ticker_task
+            return lines, lags
+
+        try:
+            lines, lags = asyncio.run(read())
+        finally:
+            os.remove(file_path)
+        self.assertEqual(lines_count, len(lines))
+        self.assertEqual('line 0\n', lines[0])
+        self.assertTrue(lags)
+        self.assertLess(max(lags), 0.1)
+
+    def test_async_save_files(self):
+        """Async text and json file savers test case."""
+        cls = self._instance_class_being_tested
+        text_path = __file__ + self._temp_value
+        json_path = text_path + '.json'
+
+        async def save():
+            await cls.async_save_text_file(text_path, [str(i) + '\n' for i in range(10)])
+            await cls.async_save_json_file(json_path, {'q': 'qwe'})
+
+        asyncio.run(save())
+        with open(text_path) as text_file:
+            self.assertEqual(10, len(text_file.readlines()))
+        with open(json_path) as json_file:
+            self.assertEqual({'q': 'qwe'}, json.load(json_file))
+        os.remove(text_path)
+        os.remove(json_path)
+
 
 class TestDescriptors(unittest.TestCase):
     """Descriptors test cases."""
@@ -195,6 +456,7 @@ class TestDescriptors(unittest.TestCase):
             nullable_dict_type = NullableDictType('nullable_dict_type')
             list_type = ListType('list_type')
             http_method = HttpMethod('http_method')
+            level = EnumStringType('level', values=['DEBUG', 'INFO', 'ERROR'], as_codes=True)
             writable_file = WritableFile('writable_file')
             bool_type = BoolType('bool_type')
             uuid_string_type = UuidStringType('uuid_string_type')
@@ -463,6 +725,48 @@ class TestDescriptors(unittest.TestCase):
         else:
             self.assertTrue(False)
 
+        self.assertIsNone(self._instance_class_being_tested.http_method)
+        self._instance_class_being_tested.http_method = 'get'
+        self.assertEqual('get', self._instance_class_being_tested.http_method)
+
+    def test_enum_string(self):
+        """Descriptor EnumStringType test cases."""
+        instance = self._instance_class_being_tested
+        instance.level = ''.join(['IN', 'FO'])
+        self.assertEqual(2, instance.__dict__['level'])
+        self.assertIs(instance.level, type(instance).__dict__['level'].choices[2])
+        self.assertEqual(1, type(instance).__dict__['level'].code('ERROR'))
+        for value in (1, None):
+            with self.assertRaises(TypeError):
+                instance.level = value
+        self.assertEqual('INFO', instance.level)
+        with self.assertRaises(TypeError):
+            instance.level = 'info'
+        self.assertIsNone(instance.__dict__['level'])
+
+        class NullableLevel(EnumStringType):
+            values = frozenset(['A', 'B'])
+            nullable = True
+
+        check = NullableLevel('level').compile_check()
+        self.assertIsNone(check(None))
+        self.assertIsNone(check('B'))
+        self.assertEqual('C is not one of A, B.', check('C'))
+        self.assertIsNone(HttpMethod('method').compile_check()('get'))
+
+        file_path = __file__ + 'enum.csv'
+        try:
+            Util.save_text_file(file_path, 'method,level\nget,A\nPOST,\n')
+            rows = list(Util.read_csv_gen(file_path, {'method': HttpMethod, 'level': NullableLevel}))
+            self.assertEqual([{'method': 'get', 'level': 'A'}, {'method': 'POST', 'level': None}], rows)
+            self.assertIs(NullableLevel('level').choices[0], rows[0]['level'])
+            Util.save_text_file(file_path, 'method\nBAD\n')
+            with self.assertRaises(ValueError) as context:
+                list(Util.read_csv_gen(file_path, {'method': HttpMethod}))
+            self.assertIn(':2: method:', str(context.exception))
+        finally:
+            os.remove(file_path)
+
 
 if __name__ == '__main__':
     unittest.main()